@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#
+#   Pluto TV payloads for the benchmarks, either generated or recorded
+#   from the live API with "python bench/run.py record".
+#
+#   FixtureSet.respond() maps a request path and its parameters to the
+#   payload the Pluto endpoint would return, so the same fixtures can be
+#   served in-process (replay.py) or over HTTP.
+#
+
+import base64
+import calendar
+import json
+import os
+import random
+import time
+
+GENRES = ("Classics", "Romance", "Thrillers", "Horror", "Sci-Fi & Fantasy", "Action & Adventure", "News + Opinion", "Educational", "Comedy", "Children & Family", "Music", "Documentaries", "Reality", "Sports")
+RATINGS = ("", "Not Rated", "TV-PG", "TV-14", "TV-MA")
+CATEGORIES = ("Movies", "Series", "News", "Comedy", "Kids", "Reality", "Sports", "Music", "Latino", "Classics")
+FILES = ("boot", "channels", "categories", "guide", "legacychannels", "vod", "seasons")
+
+
+def channelId(n):
+	return "5f%022x" % n
+
+
+def isoTime(epoch):
+	return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(epoch))
+
+
+IMAGES = "https://images.pluto.tv"
+
+
+def covers(rng, images=IMAGES):
+	return [{"aspectRatio": ratio, "url": "%s/%024x/%s.jpg" % (images, rng.getrandbits(96), ratio.replace(":", "x"))} for ratio in ("347:500", "16:9", "4:3")]
+
+
+def stitched(kind, _id):
+	return {"urls": [{"type": "hls", "url": "https://service-stitcher-ipv4.clusters.pluto.tv/stitch/hls/%s/%s/master.m3u8?deviceType=web" % (kind, _id)}]}
+
+
+def timelines(n, start, hours=24, rng=None):
+	"""One channel entry as passed to PlutoDownloadBase.buildGuide."""
+	rng = rng or random.Random(n)
+	items = []
+	begin = start
+	while begin < start + hours * 3600:
+		duration = rng.choice((15, 30, 30, 60, 60, 90, 120)) * 60
+		season = rng.choice((0, 0, 1, 2, 5))
+		items.append({
+			"start": isoTime(begin),
+			"stop": isoTime(begin + duration),
+			"title": "Programme %d" % rng.randrange(5000),
+			"episode": {
+				"_id": "%024x" % rng.getrandbits(96),
+				"number": rng.randrange(1, 24) if season else 0,
+				"season": season,
+				"name": "Episode %d" % rng.randrange(500),
+				"description": "Description of the episode " * rng.randrange(1, 6),
+				"duration": duration * 1000,
+				"genre": rng.choice(GENRES),
+				"rating": rng.choice(RATINGS),
+				"series": {
+					"_id": "%024x" % rng.getrandbits(96),
+					"name": "Series %d" % rng.randrange(2000),
+					"type": rng.choice(("tv", "film", "live")),
+					"description": "Description of the series " * rng.randrange(1, 4),
+				},
+			},
+		})
+		begin += duration
+	return {"_id": channelId(n), "description": "Channel %d" % n, "timelines": items}
+
+
+def guide(channels, hours=24, start=None, seed=0):
+	"""A list of channel entries for a lineup of the given size."""
+	rng = random.Random(seed)
+	start = start or int(time.time()) // 3600 * 3600
+	return [timelines(n, start, hours, rng) for n in range(channels)]
+
+
+def vodItem(n, rng, images=IMAGES):
+	kind = rng.choice(("movie", "movie", "series"))
+	return {
+		"_id": "%024x" % rng.getrandbits(96),
+		"name": "Title %d" % n,
+		"summary": "Summary of the title " * rng.randrange(2, 8),
+		"genre": rng.choice(GENRES),
+		"rating": rng.choice(RATINGS),
+		"duration": rng.choice((22, 45, 90, 120)) * 60000,
+		"type": kind,
+		"seasonsNumbers": list(range(1, rng.randrange(2, 6))) if kind == "series" else [],
+		"covers": covers(rng, images),
+		"stitched": stitched("vod", n) if kind == "movie" else {},
+	}
+
+
+def seasons(seasonCount=4, episodes=12, seed=0, images=IMAGES):
+	rng = random.Random(seed)
+	return {"_id": "%024x" % rng.getrandbits(96), "seasons": [{"number": season, "episodes": [{
+		"_id": "%024x" % rng.getrandbits(96),
+		"season": season,
+		"number": episode,
+		"name": "Episode %d" % episode,
+		"description": "Description of the episode " * rng.randrange(1, 6),
+		"rating": rng.choice(RATINGS),
+		"duration": rng.choice((22, 45)) * 60000,
+		"genre": rng.choice(GENRES),
+		"covers": covers(rng, images),
+		"stitched": stitched("episode", "%d-%d" % (season, episode)),
+	} for episode in range(1, episodes + 1)]} for season in range(1, seasonCount + 1)]}
+
+
+def sessionToken(lifetime=24 * 60 * 60):
+	payload = base64.urlsafe_b64encode(json.dumps({"exp": int(time.time()) + lifetime}).encode()).decode().rstrip("=")
+	return "eyJhbGciOiJIUzI1NiJ9.%s.c2lnbmF0dXJl" % payload
+
+
+class FixtureSet:
+	"""The payloads of the Pluto endpoints for one country."""
+
+	def __init__(self, boot, channels, categories, guide, legacychannels, vod, seasons):
+		self.boot = boot
+		self.channels = channels
+		self.categories = categories
+		self.guide = guide
+		self.legacychannels = legacychannels
+		self.vod = vod
+		self.seasons = seasons
+		self.starts = {entry["_id"]: [isoEpoch(item["start"]) for item in entry["timelines"]] for entry in guide}
+
+	@classmethod
+	def synthetic(cls, channels=300, hours=24, vodItems=1000, seed=0, images=IMAGES, stitcher="https://cfd-v4-service-channel-stitcher-use1-1.prd.pluto.tv"):
+		rng = random.Random(seed)
+		entries = guide(channels, hours, seed=seed)
+		channelList = [{"id": channelId(n), "name": "Channel %d" % n, "slug": "channel-%d" % n, "number": n + 1, "images": [{"type": "colorLogoPNG", "url": "%s/channels/%s/colorLogoPNG.png" % (images, channelId(n))}]} for n in range(channels)]
+		categoryList = [{"name": name, "channelIDs": [channelId(n) for n in range(channels) if n % len(CATEGORIES) == i]} for i, name in enumerate(CATEGORIES)]
+		legacy = [{"_id": channelId(n), "name": "Channel %d" % n, "slug": "channel-%d" % n, "number": n + 1, "category": CATEGORIES[n % len(CATEGORIES)], "colorLogoPNG": {"path": "%s/channels/%s/colorLogoPNG.png" % (images, channelId(n))}} for n in range(channels)]
+		vod = {"categories": [{"_id": "%024x" % i, "name": name, "items": [vodItem(n, rng, images) for n in range(i, vodItems, len(CATEGORIES))]} for i, name in enumerate(CATEGORIES)]}
+		boot = {"sessionToken": sessionToken(), "servers": {"stitcher": stitcher}, "stitcherParams": "includeExtendedEvents=false&serverSideAds=false"}
+		return cls(boot, {"data": channelList}, {"data": categoryList}, entries, legacy, vod, seasons(seed=seed, images=images))
+
+	@classmethod
+	def load(cls, folder):
+		payloads = {}
+		for name in FILES:
+			with open(os.path.join(folder, name + ".json"), "r") as f:
+				payloads[name] = json.load(f)
+		return cls(**payloads)
+
+	def save(self, folder):
+		os.makedirs(folder, exist_ok=True)
+		for name in FILES:
+			with open(os.path.join(folder, name + ".json"), "w") as f:
+				json.dump(getattr(self, name), f)
+
+	def rebase(self, start=None):
+		"""Move the guide so it starts at start, by default the current hour. Returns self."""
+		if first := min((begins[0] for begins in self.starts.values() if begins), default=None):
+			delta = (start or int(time.time()) // 3600 * 3600) - first
+			for entry in self.guide:
+				for item in entry["timelines"]:
+					for key in ("start", "stop"):
+						if key in item:
+							item[key] = isoTime(isoEpoch(item[key]) + delta)
+			self.starts = {_id: [begin + delta for begin in begins] for _id, begins in self.starts.items()}
+		return self
+
+	def window(self, entry, start, stop):
+		return [item for item, begin in zip(entry["timelines"], self.starts[entry["_id"]]) if start <= begin < stop]
+
+	def respond(self, path, params):
+		"""Payload for a request to path (without host), or None for 404."""
+		if path.endswith("/v4/start"):
+			return dict(self.boot, sessionToken=sessionToken())  # always valid
+		if path.endswith("/v2/guide/channels"):
+			return self.channels
+		if path.endswith("/v2/guide/categories"):
+			return self.categories
+		if path.endswith("/v2/guide/timelines"):
+			start = isoEpoch(params.get("start", ""))
+			stop = start + int(params.get("duration", "1440")) * 60
+			wanted = set(params.get("channelIds", "").split(","))
+			return {"data": [{"channelId": entry["_id"], "timelines": self.window(entry, start, stop)} for entry in self.guide if entry["_id"] in wanted]}
+		if path.endswith("/v2/channels.json"):
+			return self.legacychannels
+		if path.endswith("/v2/channels"):
+			start, stop = isoEpoch(params.get("start", "")), isoEpoch(params.get("stop", ""))
+			byId = {channel["_id"]: channel for channel in self.legacychannels}
+			return [dict(byId.get(entry["_id"], {}), _id=entry["_id"], timelines=self.window(entry, start, stop)) for entry in self.guide]
+		if path.endswith("/v3/vod/categories"):
+			return self.vod
+		if "/v3/vod/series/" in path and path.endswith("/seasons"):
+			return self.seasons
+		return None
+
+
+def isoEpoch(datestring):
+	try:
+		return calendar.timegm(time.strptime(datestring[:19], "%Y-%m-%dT%H:%M:%S"))
+	except ValueError:
+		return 0
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+#
+#   Memory held by the parsed guide of a synthetic lineup, as a list of
+#   tuples per channel (the old guideList) and as GuideEvents. The strings
+#   table of GuideEvents is dropped before measuring, as after a download.
+#
+#   python bench/guide_memory.py [channels] [hours]
+#
+
+import sys
+import tracemalloc
+
+from fixtures import guide
+from guide_parse import legacyBuildGuide
+from stubs import loadPlugin
+
+
+def measure(build, base, events, strings=False):
+	tracemalloc.start()
+	guideList = {}
+	kwargs = {"strings": {}} if strings else {}
+	for event in events:
+		build(base, event, guideList, **kwargs)
+	kwargs.clear()
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return size, sum(len(channel) for channel in guideList.values())
+
+
+def main(channels=300, hours=72):
+	PlutoDownload = loadPlugin()
+	base = PlutoDownload.PlutoDownloadBase()
+	events = guide(channels, hours)
+	PlutoDownload.PlutoDownloadBase.buildGuide(base, events[0], {})  # warm up caches outside the measurement
+	print("%d channels, %d hours" % (channels, hours))
+	for name, build, strings in (("tuples", legacyBuildGuide, False), ("GuideEvents", PlutoDownload.PlutoDownloadBase.buildGuide, True)):
+		size, count = measure(build, base, events, strings)
+		print("%-12s %7d events, %6.0f KiB, %5.0f KiB per 10k events" % (name, count, size / 1024, size / 1024 * 10000 / count))
+
+
+if __name__ == "__main__":
+	main(*[int(arg) for arg in sys.argv[1:]])
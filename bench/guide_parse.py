@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+#   Compare PlutoDownloadBase.buildGuide against the strptime/mktime
+#   conversion it used before, on a synthetic lineup.
+#
+#   python bench/guide_parse.py [channels] [hours]
+#
+
+import datetime
+import sys
+import time
+
+from fixtures import guide
+from stubs import loadPlugin
+
+
+def legacyBuildGuide(self, event, guideList, since=0):
+	"""buildGuide as it was before the ISO timestamp fast path."""
+	_id = event.get("_id", "")
+	if len(_id) == 0:
+		return
+	guideList[_id] = events = []
+	chplot = (event.get("description", "") or event.get("summary", ""))
+	for item in event.get("timelines", []):
+		episode = (item.get("episode", {}) or item)
+		series = (episode.get("series", {}) or item)
+		epdur = int(episode.get("duration", "0") or "0") // 1000
+		genre = self.convertgenre.__wrapped__(episode.get("genre", ""))
+		offset = datetime.datetime.now() - datetime.datetime.utcnow()
+		try:
+			starttime = datetime.datetime.strptime(item["start"], "%Y-%m-%dT%H:%M:%S.%fZ") + offset
+		except ValueError:
+			return
+		start = time.mktime(starttime.timetuple())
+		if start + epdur <= since:
+			continue
+		title = item.get("title", "")
+		tvplot = (series.get("description", "") or series.get("summary", "") or chplot)
+		epnumber = episode.get("number", 0)
+		epseason = episode.get("season", 0)
+		epname = episode["name"]
+		epmpaa = episode.get("rating", "")
+		epplot = (episode.get("description", "") or tvplot or epname)
+		if len(epmpaa) > 0 and "Not Rated" not in epmpaa:
+			epplot = "(%s). %s" % (epmpaa, epplot)
+		if epseason > 0 and epnumber > 0 and series.get("type", "film") not in "live film":
+			title = title + " (T%d)" % epseason
+			epplot = "T%d Ep.%d %s" % (epseason, epnumber, epplot)
+		if epdur > 0:
+			events.append((title, epplot, start, epdur, genre))
+
+
+def run(build, base, events):
+	guideList = {}
+	begin = time.perf_counter()
+	for event in events:
+		build(base, event, guideList)
+	return time.perf_counter() - begin, guideList
+
+
+def main(channels=300, hours=24):
+	PlutoDownload = loadPlugin()
+	base = PlutoDownload.PlutoDownloadBase()
+	events = guide(channels, hours)
+	items = sum(len(event["timelines"]) for event in events)
+	PlutoDownload.isoTimestamp.cache_clear()
+	legacy, expected = run(legacyBuildGuide, base, events)
+	current, result = run(PlutoDownload.PlutoDownloadBase.buildGuide, base, events)
+	# the old offset arithmetic could land a second early, see the commit adding isoTimestamp
+	assert all(abs(a[2] - b[2]) <= 1 and a[:2] + a[3:] == b[:2] + b[3:] for k in expected for a, b in zip(expected[k], list(result[k]))), "results differ"
+	print("%d channels, %d timeline items" % (channels, items))
+	print("strptime: %.1f ms (%.2f us/item)" % (legacy * 1000, legacy * 1e6 / items))
+	print("current:  %.1f ms (%.2f us/item), %.1fx faster" % (current * 1000, current * 1e6 / items, legacy / current))
+
+
+if __name__ == "__main__":
+	main(*[int(arg) for arg in sys.argv[1:]])
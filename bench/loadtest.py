@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+#   End to end LiveTV update against the local stand-in server: bouquets,
+#   guide, EPG import and picons, with the faults of server.py injected.
+#
+#   python bench/loadtest.py [--countries us,de,gb] [--channels 300]
+#                            [--hours 24] [--engine requests|twisted]
+#                            [--picons srp|snp] [--picon-workers 16]
+#                            [--picon-dir DIR] [--port 0]
+#                            [--latency ...] [--bandwidth ...] [--errors ...]
+#                            [--throttle ...] [--silent] [--reactor]
+#
+#   Prints a JSON report with the stage times of the run (PipelineStats),
+#   the HTTP client counters and the responses the server sent.
+#
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import fixtures
+import server
+import stubs
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--countries", default="us,de,gb")
+	parser.add_argument("--channels", type=int, default=300)
+	parser.add_argument("--hours", type=int, default=24)
+	parser.add_argument("--engine", default="requests", choices=("requests", "twisted"))
+	parser.add_argument("--concurrency", default="4", help="guide requests in parallel")
+	parser.add_argument("--picons", default="srp", choices=("srp", "snp", ""))
+	parser.add_argument("--picon-workers", default="16", choices=("4", "8", "16", "32"))
+	parser.add_argument("--picon-dir", help="picon folder to keep between runs, a new temporary one by default")
+	parser.add_argument("--latency")
+	parser.add_argument("--bandwidth")
+	parser.add_argument("--errors")
+	parser.add_argument("--throttle")
+	parser.add_argument("--image-size", type=int, default=8000)
+	parser.add_argument("--port", type=int, default=0, help="port of the stand-in server, a free one by default")
+	parser.add_argument("--silent", action="store_true", help="run as the automatic update")
+	parser.add_argument("--reactor", action="store_true", help="call download() on the reactor thread, like the timer of the automatic update")
+	parser.add_argument("--seed", type=int)
+	parser.add_argument("--timeout", type=float, default=300, help="seconds before the run is given up")
+	args = parser.parse_args()
+
+	piconDir = args.picon_dir or tempfile.mkdtemp(prefix="plutotv-picons-")
+	os.makedirs(piconDir, exist_ok=True)
+	stubs.install()
+	stubs._module("Components.Renderer.Picon", lastPiconPath=piconDir, searchPaths=[piconDir])
+	PlutoDownload = stubs.loadPlugin()
+	from twisted.internet import defer, reactor, threads
+
+	standIn = server.StandInServer(("127.0.0.1", args.port), None, server.Faults(server.perEndpoint(args.latency), server.perEndpoint(args.bandwidth), server.perEndpoint(args.errors), server.perEndpoint(args.throttle), args.seed), args.image_size)
+	standIn.fixtures = fixtures.FixtureSet.synthetic(args.channels, args.hours, images=standIn.baseURL)
+	standIn.start()
+
+	plutotv = PlutoDownload.config.plugins.plutotv
+	for n, cc in enumerate(args.countries.split(","), 1):
+		getattr(plutotv, "live_tv_country%d" % n).value = cc
+	plutotv.picons.value = args.picons
+	plutotv.picon_workers.value = args.picon_workers
+	plutotv.http_engine.value = args.engine
+	plutotv.fetch_concurrency.value = args.concurrency
+	plutotv.epg_hours.value = str(args.hours)
+
+	class LoadTestDownload(PlutoDownload.PlutoDownloadBase):
+		def start(self):  # called when the run is complete, from any thread
+			reactor.callFromThread(reactor.stop)
+
+	def failed(failure):
+		failure.printTraceback()
+		reactor.stop()
+
+	begin = time.perf_counter()
+	if args.reactor:
+		reactor.callWhenRunning(lambda: defer.maybeDeferred(LoadTestDownload(silent=args.silent).download).addErrback(failed))
+	else:
+		reactor.callWhenRunning(lambda: threads.deferToThread(LoadTestDownload(silent=args.silent).download).addErrback(failed))
+	watchdog = threading.Timer(args.timeout, lambda: (print("[loadtest] timed out", file=sys.stderr), os._exit(1)))  # the reactor may be the one that hangs
+	watchdog.daemon = True
+	watchdog.start()
+	with contextlib.redirect_stdout(sys.stderr):  # the log of the plugin, stdout is for the report
+		PlutoDownload.plutoRequest.setBaseURL(standIn.baseURL)
+		reactor.run()
+	report = {
+		"seconds": round(time.perf_counter() - begin, 3),
+		"run": (PlutoDownload.pipelineStats.load() or [None])[-1],
+		"http": PlutoDownload.httpClient.stats(),
+		"server": standIn.counts,
+		"picons": len([name for name in os.listdir(piconDir) if name.endswith(".png")]),
+	}
+	print(json.dumps(report, indent=1))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+#   Serve a FixtureSet to the plugin in-process, through the real
+#   PlutoHTTPClient, by mounting a transport adapter on its session.
+#
+
+import io
+import json
+from urllib.parse import parse_qsl, urlsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+class ReplayAdapter(BaseAdapter):
+	def __init__(self, fixtures):
+		super().__init__()
+		self.fixtures = fixtures
+		self.requests = 0
+		self.bytes = 0
+
+	def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+		url = urlsplit(request.url)
+		payload = self.fixtures.respond(url.path, dict(parse_qsl(url.query)))
+		content = b"" if payload is None else json.dumps(payload).encode()
+		self.requests += 1
+		self.bytes += len(content)
+		response = Response()
+		response.status_code = 404 if payload is None else 200
+		response.reason = "Not Found" if payload is None else "OK"
+		response.headers = CaseInsensitiveDict({"Content-Type": "application/json", "Content-Length": str(len(content))})
+		response.raw = io.BytesIO(content)
+		response._content = content
+		response._content_consumed = True
+		response.url = request.url
+		response.request = request
+		response.connection = self
+		return response
+
+	def close(self):
+		pass
+
+
+def install(httpClient, fixtures):
+	"""Route all requests of httpClient to fixtures. Returns the adapter."""
+	adapter = ReplayAdapter(fixtures)
+	httpClient.session.mount("https://", adapter)
+	httpClient.session.mount("http://", adapter)
+	return adapter
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+#
+#   Offline benchmark of the LiveTV and VoD code paths of the plugin.
+#
+#   python bench/run.py [--sizes 50,300,1000] [--hours 24] [--repeat 3]
+#                       [--fixtures DIR] [--output FILE]
+#                       [--compare BASELINE.json] [--tolerance 0.25]
+#   python bench/run.py record --country us --out DIR
+#
+#   Every stage runs against fixtures served through the real HTTP client
+#   (see replay.py). Its best time of --repeat runs is reported, then it is
+#   run once more under tracemalloc for the peak memory. Results are JSON.
+#   With --compare the exit status is 1 when a stage got slower or uses
+#   more memory than the baseline allows.
+#
+
+import argparse
+import contextlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import types
+
+import fixtures
+import replay
+from stubs import loadPlugin
+
+COUNTRY = "us"
+
+
+class Bench:
+	def __init__(self, fixtureSet, hours=24):
+		self.plugin = loadPlugin(gui=True)
+		self.PlutoDownload = PlutoDownload = loadPlugin()
+		PlutoDownload.config.plugins.plutotv.picons.value = ""
+		self.fixtures = fixtureSet
+		self.hours = hours
+		self.adapter = replay.install(PlutoDownload.httpClient, fixtureSet)
+		self.plutoRequest = PlutoDownload.plutoRequest
+		self.plutoRequest.requestCache.clear()
+		self.plutoRequest.apiRoutes = {}
+		self.plutoRequest.boot(COUNTRY, force=True)
+		self.channels = self.plutoRequest.getChannels(COUNTRY)
+		self.window = PlutoDownload.PlutoDownloadBase.guideWindow(0, hours)
+		self.entries = self.fetchGuide()
+
+	def downloader(self):
+		PlutoDownload = self.PlutoDownload
+
+		class BenchDownload(PlutoDownload.PlutoDownloadBase):
+			def manager(self):
+				pass  # one country only, the run ends with its bouquet
+
+		download = BenchDownload(silent=False)  # manual update, always the complete guide
+		download.ccList, download.ccIndex, download.prefetched, download.prefetcher = [COUNTRY], 1, {}, None
+		download.piconFetcher = PlutoDownload.PiconFetcher(download)
+		download.epgFingerprints = PlutoDownload.EPGFingerprints()
+		download.epgFingerprints.services.clear()
+		download.bouquetCC, download.tsid, download.bouquet = COUNTRY, PlutoDownload.TSIDS[COUNTRY], []
+		return download
+
+	def fetchGuide(self):
+		entries = []
+		for start, stop in self.PlutoDownload.GuideWindows(COUNTRY, self.channels, *self.window).windows:
+			self.PlutoDownload.PlutoDownloadBase.getGuidedata(COUNTRY, start, stop, entries.append, self.channels)
+		return entries
+
+	# Each stage prepares its input untimed and returns the function to time,
+	# which returns the number of items it processed.
+
+	def stageChannels(self):
+		return lambda: len(self.plutoRequest.getChannels(COUNTRY))
+
+	def stageTimelines(self):
+		return lambda: sum(len(entry["timelines"]) for entry in self.fetchGuide())
+
+	def stageLegacyGuide(self):
+		start, stop = (time.strftime("%Y-%m-%dT%H:00:00Z", time.gmtime(t)) for t in self.window)
+		return lambda: sum(len(entry["timelines"]) for entry in self.plutoRequest._getBaseGuideLegacy(start, stop, COUNTRY))
+
+	def stageParse(self):
+		download = self.downloader()
+
+		def run():
+			guideList = {}
+			for entry in self.entries:
+				download.buildGuide(entry, guideList)
+			return sum(len(entry["timelines"]) for entry in self.entries)
+		return run
+
+	def stageM3U(self):
+		download = self.downloader()
+
+		def run():
+			download.channelsList, download.categories = {}, []
+			for channel in self.channels:
+				download.buildM3U(channel)
+			return len(self.channels)
+		return run
+
+	def stageImport(self):
+		download = self.downloader()
+		for channel in self.channels:
+			download.buildM3U(channel)
+		guideList = {}
+		for entry in self.entries:
+			download.buildGuide(entry, guideList)
+		download.guideList, download.guide = guideList, None
+		download.total = len(self.channels)
+		download.subtotal, download.key, download.chitem = len(download.channelsList[download.categories[0]]), 0, 0
+		download.epgImporter = self.PlutoDownload.EPGImporter(download.epgcache, fingerprints=download.epgFingerprints)
+
+		def run():
+			for i in range(download.total + 1):
+				download.updateprogress(param=i)
+			return download.epgImporter.stats()["events"]
+		return run
+
+	def stageDownload(self):
+		download = self.downloader()
+
+		def run():
+			download.downloadBouquet(COUNTRY)
+			return download.total
+		return run
+
+	def stageCatalog(self):
+		catalog = self.plutoRequest.getOndemand(COUNTRY)
+		screen = types.SimpleNamespace(lvod={}, menu=[])
+
+		def run():
+			screen.lvod.clear()
+			screen.menu.clear()
+			for category in catalog["categories"]:
+				self.plugin.PlutoTV.buildlist(screen, category)
+			return sum(len(films) for films in screen.lvod.values())
+		return run
+
+	def stageSeasons(self):
+		seasons = self.plutoRequest.getVOD("series", COUNTRY)
+		screen = types.SimpleNamespace(chapters={})
+
+		def run():
+			self.plugin.PlutoTV.buildchapters(screen, seasons)
+			return sum(len(episodes) for episodes in screen.chapters.values())
+		return run
+
+	STAGES = (
+		("channels", stageChannels),
+		("timelines", stageTimelines),
+		("legacy guide", stageLegacyGuide),
+		("parse", stageParse),
+		("m3u", stageM3U),
+		("import", stageImport),
+		("download", stageDownload),
+		("vod catalog", stageCatalog),
+		("seasons", stageSeasons),
+	)
+
+	def run(self, repeat=3):
+		results = []
+		for name, stage in self.STAGES:
+			best = None
+			for i in range(repeat):
+				func = stage(self)
+				sent = self.adapter.requests
+				begin = time.perf_counter()
+				items = func()
+				seconds = time.perf_counter() - begin
+				requests = self.adapter.requests - sent  # of the timed call only
+				best = seconds if best is None else min(best, seconds)
+			func = stage(self)
+			tracemalloc.start()
+			func()
+			peak = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+			results.append({
+				"stage": name,
+				"items": items,
+				"requests": requests,
+				"seconds": round(best, 6),
+				"itemsPerSecond": round(items / best, 1) if best else None,
+				"peakKiB": round(peak / 1024, 1),
+			})
+			print("[bench] %(stage)-12s %(items)7d items  %(seconds)9.4fs  %(itemsPerSecond)12s/s  peak %(peakKiB)9.1f KiB" % results[-1], file=sys.stderr)
+		return results
+
+
+def compare(report, baseline, tolerance):
+	"""Stages of report slower or bigger than baseline by more than tolerance."""
+	previous = {(entry["lineup"], entry["stage"]): entry for entry in baseline["results"]}
+	regressions = []
+	for entry in report["results"]:
+		if old := previous.get((entry["lineup"], entry["stage"])):
+			for key in ("seconds", "peakKiB"):
+				if old[key] and entry[key] > old[key] * (1 + tolerance):
+					regressions.append("%s/%s %s: %s -> %s" % (entry["lineup"], entry["stage"], key, old[key], entry[key]))
+	return regressions
+
+
+def record(country, folder):
+	"""Save the live responses of the Pluto API for country as a fixture set."""
+	PlutoDownload = loadPlugin()
+	plutoRequest = PlutoDownload.plutoRequest
+	boot = plutoRequest.boot(country, force=True)
+	headers = plutoRequest._authHeaders(country)
+	channels = plutoRequest._getChannelList(country, headers) or []
+	start, stop = PlutoDownload.PlutoDownloadBase.guideWindow()
+	guide = plutoRequest.getBaseGuide(*(time.strftime("%Y-%m-%dT%H:00:00Z", time.gmtime(t)) for t in (start, stop)), country, duration=(stop - start) // 60)
+	vod = plutoRequest.getOndemand(country)
+	series = next((item["_id"] for category in vod.get("categories", []) for item in category.get("items", []) if item.get("type") == "series"), "")
+	fixtureSet = fixtures.FixtureSet(boot, {"data": channels}, {"data": plutoRequest._getCategories(country, headers)}, [{"_id": entry["_id"], "timelines": entry["timelines"]} for entry in guide], plutoRequest._getChannelsLegacy(country), vod, plutoRequest.getVOD(series, country) if series else {})
+	fixtureSet.save(folder)
+	print("[bench] recorded %d channels, %d guide entries, %d VoD categories to %s" % (len(channels), len(guide), len(vod.get("categories", [])), folder), file=sys.stderr)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("command", nargs="?", default="run", choices=("run", "record"))
+	parser.add_argument("--sizes", default="50,300,1000", help="lineup sizes of the generated fixtures")
+	parser.add_argument("--hours", type=int, default=24, help="guide length of the generated fixtures")
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--fixtures", action="append", default=[], help="recorded fixture folder, instead of generated lineups")
+	parser.add_argument("--output", help="write the JSON report here instead of stdout")
+	parser.add_argument("--compare", help="JSON report to compare against")
+	parser.add_argument("--tolerance", type=float, default=0.25)
+	parser.add_argument("--country", default=COUNTRY, help="country to record")
+	parser.add_argument("--out", default="fixtures-recorded", help="folder to record to")
+	args = parser.parse_args()
+
+	if args.command == "record":
+		return record(args.country, args.out)
+
+	sets = [(folder, fixtures.FixtureSet.load(folder).rebase()) for folder in args.fixtures] or [(int(size), fixtures.FixtureSet.synthetic(int(size), args.hours)) for size in args.sizes.split(",")]
+	report = {
+		"python": platform.python_version(),
+		"machine": platform.machine(),
+		"time": int(time.time()),
+		"hours": args.hours,
+		"repeat": args.repeat,
+		"results": [],
+	}
+	with contextlib.redirect_stdout(sys.stderr):  # the log of the plugin, stdout is for the report
+		for lineup, fixtureSet in sets:
+			print("[bench] lineup %s" % lineup)
+			report["results"] += [dict(result, lineup=lineup) for result in Bench(fixtureSet, args.hours).run(args.repeat)]
+	output = json.dumps(report, indent=1)
+	if args.output:
+		with open(args.output, "w") as f:
+			f.write(output)
+	else:
+		print(output)
+	if args.compare:
+		with open(args.compare, "r") as f:
+			if regressions := compare(report, json.load(f), args.tolerance):
+				print("[bench] regressions:\n" + "\n".join(regressions), file=sys.stderr)
+				return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+#
+#   Local stand-in for the Pluto TV hosts used by the plugin: boot, the
+#   service-channels guide API, the legacy api.pluto.tv endpoints, VoD and
+#   images, on one port. Payloads come from a FixtureSet.
+#
+#   python bench/server.py [--port 8080] [--channels 300] [--hours 24]
+#                          [--fixtures DIR] [--latency timelines=0.2,*=0.02]
+#                          [--bandwidth 2000000] [--errors timelines=0.05]
+#                          [--throttle images=0.02] [--image-size 8000]
+#
+#   Point the plugin at it with PLUTOTV_BASE_URL=http://host:port, or
+#   plutoRequest.setBaseURL(). Rates are per endpoint, "*" applies to all
+#   endpoints without their own value. Endpoints: boot, channels,
+#   categories, timelines, legacy-channels, legacy-guide, vod, seasons,
+#   images.
+#
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import fixtures
+
+ENDPOINTS = (
+	("boot", "/v4/start"),
+	("channels", "/v2/guide/channels"),
+	("categories", "/v2/guide/categories"),
+	("timelines", "/v2/guide/timelines"),
+	("legacy-channels", "/v2/channels.json"),
+	("legacy-guide", "/v2/channels"),
+	("vod", "/v3/vod/categories"),
+	("seasons", "/seasons"),
+)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def endpoint(path):
+	if path.lower().endswith(IMAGE_EXTENSIONS):
+		return "images"
+	return next((name for name, suffix in ENDPOINTS if path.endswith(suffix)), "")
+
+
+def perEndpoint(spec, cast=float):
+	"""Parse "timelines=0.2,*=0.01" into {"timelines": 0.2, "*": 0.01}."""
+	values = {}
+	for part in filter(None, (spec or "").split(",")):
+		name, __, value = part.rpartition("=")
+		values[name or "*"] = cast(value)
+	return values
+
+
+class Faults:
+	"""Latency, bandwidth and error injection settings, per endpoint."""
+
+	def __init__(self, latency=None, bandwidth=None, errors=None, throttle=None, seed=None):
+		self.latency = latency or {}
+		self.bandwidth = bandwidth or {}
+		self.errors = errors or {}
+		self.throttle = throttle or {}
+		self.random = random.Random(seed)
+		self.lock = threading.Lock()
+
+	@staticmethod
+	def value(values, name):
+		return values.get(name, values.get("*", 0))
+
+	def roll(self, values, name):
+		with self.lock:
+			return self.random.random() < self.value(values, name)
+
+	def errorStatus(self):
+		with self.lock:
+			return self.random.choice((500, 502, 503))
+
+
+class StandInServer(ThreadingHTTPServer):
+	daemon_threads = True
+	request_queue_size = 256  # the picon fetcher opens up to 100 connections at once
+
+	def __init__(self, address, fixtureSet, faults=None, imageSize=8000):
+		super().__init__(address, Handler)
+		self.fixtures = fixtureSet
+		self.faults = faults or Faults()
+		self.imageSize = imageSize
+		self.lock = threading.Lock()
+		self.counts = {}
+
+	@property
+	def baseURL(self):
+		return "http://%s:%d" % self.server_address[:2]
+
+	def count(self, name, status):
+		with self.lock:
+			key = "%s %d" % (name, status)
+			self.counts[key] = self.counts.get(key, 0) + 1
+
+	def image(self, path):
+		"""A fake image of imageSize bytes, the same for the same path."""
+		seed = hashlib.md5(path.encode()).digest()
+		return (b"\x89PNG\r\n\x1a\n" + seed * (self.imageSize // len(seed) + 1))[:self.imageSize]
+
+	def start(self):
+		"""Serve from a daemon thread. Returns self."""
+		threading.Thread(target=self.serve_forever, daemon=True).start()
+		return self
+
+
+class Handler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"  # keep-alive, like the Pluto hosts
+
+	def do_GET(self):
+		server, faults = self.server, self.server.faults
+		url = urlsplit(self.path)
+		name = endpoint(url.path)
+		if latency := faults.value(faults.latency, name):
+			time.sleep(latency)
+		if faults.roll(faults.throttle, name):
+			return self.reply(name, 429, b'{"error": "rate limited"}', {"Retry-After": "1"})
+		if faults.roll(faults.errors, name):
+			return self.reply(name, faults.errorStatus(), b'{"error": "injected"}')
+		if name == "images":
+			content = server.image(url.path)
+			etag = '"%s"' % hashlib.md5(content).hexdigest()
+			if self.headers.get("If-None-Match") == etag:
+				return self.reply(name, 304, b"", {"ETag": etag})
+			return self.reply(name, 200, content, {"Content-Type": "image/png", "ETag": etag})
+		payload = server.fixtures.respond(url.path, dict(parse_qsl(url.query)))
+		if payload is None:
+			return self.reply(name or url.path, 404, b'{"error": "not found"}')
+		self.reply(name, 200, json.dumps(payload).encode())
+
+	def reply(self, name, status, content, headers=None):
+		self.server.count(name, status)
+		self.send_response(status)
+		self.send_header("Content-Length", str(len(content)))
+		for key, value in ({"Content-Type": "application/json"} | (headers or {})).items():
+			self.send_header(key, value)
+		self.end_headers()
+		if bandwidth := self.server.faults.value(self.server.faults.bandwidth, name):
+			chunk = max(int(bandwidth) // 20, 1024)  # 50 ms worth of data
+			for offset in range(0, len(content), chunk):
+				self.wfile.write(content[offset:offset + chunk])
+				time.sleep(min(chunk, len(content) - offset) / bandwidth)
+		else:
+			self.wfile.write(content)
+
+	def log_message(self, format, *args):
+		pass
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8080)
+	parser.add_argument("--channels", type=int, default=300, help="lineup size of the generated fixtures")
+	parser.add_argument("--hours", type=int, default=72, help="guide length of the generated fixtures")
+	parser.add_argument("--vod-items", type=int, default=1000)
+	parser.add_argument("--fixtures", help="recorded fixture folder, see run.py record")
+	parser.add_argument("--latency", help="seconds before each response, per endpoint")
+	parser.add_argument("--bandwidth", help="bytes per second of each response, per endpoint")
+	parser.add_argument("--errors", help="rate of 5xx responses, per endpoint")
+	parser.add_argument("--throttle", help="rate of 429 responses, per endpoint")
+	parser.add_argument("--image-size", type=int, default=8000, help="bytes per image")
+	parser.add_argument("--seed", type=int)
+	args = parser.parse_args()
+
+	base = "http://%s:%d" % (args.host, args.port)
+	fixtureSet = fixtures.FixtureSet.load(args.fixtures).rebase() if args.fixtures else fixtures.FixtureSet.synthetic(args.channels, args.hours, args.vod_items, images=base)
+	faults = Faults(perEndpoint(args.latency), perEndpoint(args.bandwidth), perEndpoint(args.errors), perEndpoint(args.throttle), args.seed)
+	server = StandInServer((args.host, args.port), fixtureSet, faults, args.image_size)
+	print("[server] serving %d channels on %s, use PLUTOTV_BASE_URL=%s" % (len(fixtureSet.guide), base, base), file=sys.stderr)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	print("[server] %s" % json.dumps(server.counts, sort_keys=True), file=sys.stderr)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+#   In-process stand-ins for the enigma2 modules used by the PlutoTV plugin,
+#   so parts of it can be benchmarked on a development machine.
+#
+#   Only what the plugin touches is emulated. requests and twisted are real
+#   dependencies and must be installed.
+#
+
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = tempfile.mkdtemp(prefix="plutotv-bench-")
+
+
+class ConfigElement:
+	def __init__(self, default=None, choices=None, **kwargs):
+		self.value = default
+		self.choices = choices
+		self.notifiers = []
+
+	def setChoices(self, choices, default=None):
+		self.choices = choices
+
+	def addNotifier(self, notifier, initial_call=True, immediate_feedback=True):
+		self.notifiers.append(notifier)
+
+	def save(self):
+		pass
+
+
+class ConfigSubsection:
+	pass
+
+
+class eServiceReference:
+	def __init__(self, ref):
+		self.ref = ref
+
+	def toString(self):
+		return self.ref
+
+
+class eEPGCache:
+	instance = None
+
+	def __init__(self):
+		self.services = 0
+		self.events = 0
+		self.calls = 0
+
+	@classmethod
+	def getInstance(cls):
+		if cls.instance is None:
+			cls.instance = cls()
+		return cls.instance
+
+	def importEvents(self, refs, events):
+		self.calls += 1
+		self.services += len(refs) if isinstance(refs, (list, tuple)) else 1
+		self.events += len(events)
+
+	def lookupEventTime(self, ref, begin, direction=0):
+		return None
+
+
+class eDVBDB:
+	instance = None
+
+	def __init__(self):
+		self.bouquets = {}
+
+	@classmethod
+	def getInstance(cls):
+		if cls.instance is None:
+			cls.instance = cls()
+		return cls.instance
+
+	def addOrUpdateBouquet(self, name, filename, services, isAddedFirst):
+		self.bouquets[filename] = (name, services)
+
+	def removeBouquet(self, pattern):
+		pass
+
+
+class eTimer:
+	def __init__(self):
+		self.callback = []
+		self.timeout = types.SimpleNamespace(get=lambda: self.callback)
+
+	def start(self, msec, singleShot=False):
+		pass
+
+	def startLongTimer(self, seconds):
+		pass
+
+	def stop(self):
+		pass
+
+
+class Dummy:
+	def __init__(self, *args, **kwargs):
+		pass
+
+
+class GUIModule(types.ModuleType):
+	"""Module whose missing names are distinct stand-in classes, enough to import plugin.py."""
+	def __getattr__(self, name):
+		if name.startswith("__"):
+			raise AttributeError(name)
+		value = type(name, (Dummy,), {})
+		setattr(self, name, value)
+		return value
+
+
+def _module(name, moduleType=types.ModuleType, **attrs):
+	module = sys.modules.get(name) or moduleType(name)
+	if moduleType is not types.ModuleType:
+		module.__class__ = moduleType
+	module.__dict__.update(attrs)
+	sys.modules[name] = module
+	parent, __, child = name.rpartition(".")
+	if parent:
+		setattr(_module(parent), child, module)
+	return module
+
+
+def install():
+	config = ConfigSubsection()
+	config.plugins = ConfigSubsection()
+	config.usage = ConfigSubsection()
+	_module("enigma", eDVBDB=eDVBDB, eEPGCache=eEPGCache, eServiceReference=eServiceReference, eTimer=eTimer)
+	_module("Components.config", ConfigSelection=ConfigElement, ConfigSubsection=ConfigSubsection, ConfigYesNo=ConfigElement, ConfigInteger=ConfigElement, ConfigNothing=ConfigElement, config=config)
+	_module("Components.ActionMap", ActionMap=Dummy)
+	_module("Components.Label", Label=Dummy)
+	_module("Components.ProgressBar", ProgressBar=Dummy)
+	_module("Components.Language", language=types.SimpleNamespace(addCallback=lambda callback: None))
+	_module("Screens.MessageBox", MessageBox=Dummy)
+	_module("Screens.Screen", Screen=object)
+	_module("Tools.CountryCodes", ISO3166=[("Austria", "AT"), ("Brazil", "BR"), ("Canada", "CA"), ("Denmark", "DK"), ("Finland", "FI"), ("France", "FR"), ("Germany", "DE"), ("Italy", "IT"), ("Mexico", "MX"), ("Spain", "ES"), ("United Kingdom", "GB"), ("United States", "US")])
+	_module("Tools.Directories", fileExists=os.path.exists, sanitizeFilename=lambda name: name.replace("/", "_"), resolveFilename=lambda scope, path="": os.path.join(CONFIG_DIR, path), SCOPE_CONFIG=0, SCOPE_PLUGINS=1)
+
+
+def installGUI():
+	"""Stand-ins for the screens and widgets imported by plugin.py."""
+	install()
+	for name in ("skin", "Components.AVSwitch", "Components.MenuList", "Components.MultiContent", "Components.Pixmap", "Components.ScrollLabel", "Components.ServiceEventTracker", "Components.Sources.StaticText", "Plugins.Plugin", "Screens.ChoiceBox", "Screens.HelpMenu", "Screens.InfoBar", "Screens.Setup", "Tools.Hex2strColor", "Tools.LoadPixmap", "Tools.Notifications"):
+		_module(name, GUIModule)
+	_module("skin", fonts={}, parameters={}, applySkinFactor=lambda *args: args)
+	_module("Screens.Screen", GUIModule, Screen=type("Screen", (Dummy,), {}))
+	_module("Components.ActionMap", GUIModule, ActionMap=Dummy, HelpableActionMap=Dummy)
+	_module("Components.Harddisk", harddiskmanager=types.SimpleNamespace(getMountedPartitions=lambda: [], on_partition_list_change=[]))
+	_module("Tools.Directories", isPluginInstalled=lambda name: False, SCOPE_CURRENT_SKIN=2)
+	_module("Tools", Notifications=sys.modules["Tools.Notifications"])
+	_module("enigma", GUIModule, BT_KEEP_ASPECT_RATIO=1, BT_SCALE=2, iPlayableService=Dummy)
+
+
+def loadPlugin(gui=False):
+	"""Install the stand-ins and import src/ as package PlutoTV.
+
+	Returns PlutoTV.PlutoDownload, or PlutoTV.plugin when gui is set.
+	"""
+	installGUI() if gui else install()
+	if "PlutoTV" not in sys.modules:
+		spec = importlib.util.spec_from_file_location("PlutoTV", os.path.join(ROOT, "src", "__init__.py"), submodule_search_locations=[os.path.join(ROOT, "src")])
+		package = importlib.util.module_from_spec(spec)
+		sys.modules["PlutoTV"] = package
+		spec.loader.exec_module(package)
+	return importlib.import_module("PlutoTV.plugin" if gui else "PlutoTV.PlutoDownload")
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+#
+#   Micro-benchmark of PlutoRequest.recordServiceExtension, the code run on
+#   every zap to a Pluto TV service.
+#
+#   python bench/zap_latency.py [iterations]
+#
+
+import sys
+import time
+
+from stubs import loadPlugin
+
+
+def main(iterations=10000):
+	PlutoDownload = loadPlugin()
+	plutoRequest = PlutoDownload.plutoRequest
+	country = "us"
+	plutoRequest.bootCache[country] = {
+		"response": {"sessionToken": "header.payload.signature"},
+		"exp": time.time() + 24 * 60 * 60,
+		"stitcherUrl": plutoRequest.STITCHER_FALLBACK,
+		"stitcherParams": "includeExtendedEvents=false&serverSideAds=false",
+	}
+	srefs = [PlutoDownload.eServiceReference("4097:0:1:%X:%s:FF:CCCC0000:0:0:0:%s5f%06d:Channel %d" % (n, PlutoDownload.TSIDS[country], plutoRequest.PLUTO_SCHEMA, n, n)) for n in range(300)]
+	plutoRequest.zapTimes = PlutoDownload.deque(maxlen=iterations)
+	for i in range(iterations):
+		plutoRequest.recordServiceExtension(None, srefs[i % len(srefs)])
+	stats = plutoRequest.zapStats()
+	print("recordServiceExtension: %(count)d calls, p50 %(p50).4f ms, p99 %(p99).4f ms" % stats)
+
+
+if __name__ == "__main__":
+	main(*[int(arg) for arg in sys.argv[1:]])
@@ -26,10 +26,10 @@
 
 # for localized messages
 from . import _
-from .Variables import TIMER_FILE, PLUGIN_FOLDER, BOUQUET_FILE, BOUQUET_NAME, NUMBER_OF_LIVETV_BOUQUETS, PLUGIN_ICON, USER_AGENT
+from .Variables import API_ROUTES_FILE, BOOT_CACHE_FILE, EPG_COVERAGE_FILE, EPG_FINGERPRINT_FILE, PIPELINE_STATS_FILE, TIMER_FILE, PLUGIN_FOLDER, BOUQUET_FILE, BOUQUET_NAME, NUMBER_OF_LIVETV_BOUQUETS, PLUGIN_ICON, USER_AGENT
 
 from Components.ActionMap import ActionMap
-from Components.config import ConfigSelection, ConfigSubsection, config
+from Components.config import ConfigSelection, ConfigSubsection, ConfigYesNo, config
 from Components.Label import Label
 from Components.ProgressBar import ProgressBar
 from Screens.MessageBox import MessageBox
@@ -39,16 +39,662 @@ from Tools.Directories import fileExists, sanitizeFilename
 
 from enigma import eDVBDB, eEPGCache, eServiceReference, eTimer
 
+import calendar
+import codecs
+import cProfile
 import datetime
+import hashlib
+import json
 import os
+import pstats
+import pickle
+import queue
+import random
 import re
 import requests
+from requests.adapters import HTTPAdapter
 import shutil
 import time
+import tracemalloc
 import uuid
+import zlib
+from array import array
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from urllib.parse import urlencode, urlsplit
 
 import threading  # for fetching picons
+from twisted.internet import defer, reactor, task
 from twisted.internet import threads  # for updating GUI widgets
+from twisted.python.threadable import isInIOThread
+
+MAX_PICON_WORKERS = 32  # upper limit of the picon_workers setting
+PICON_HOST_CONNECTIONS = 16  # picon downloads at the same time per image host
+MAX_GUIDE_REQUESTS = 8 * 3  # guide requests at the same time per API host, highest fetch_concurrency times country_concurrency
+POOL_SIZE = max(min(MAX_PICON_WORKERS, PICON_HOST_CONNECTIONS), MAX_GUIDE_REQUESTS)  # connections kept alive per host
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+	pass
+
+
+class CircuitBreaker:
+	"""Stop sending requests to a host that keeps failing.
+
+	After FAILURE_THRESHOLD consecutive failures the circuit opens and
+	requests fail at once. After RESET_TIMEOUT one trial request is let
+	through, its result closes the circuit or opens it again.
+	"""
+	FAILURE_THRESHOLD = 3
+	RESET_TIMEOUT = 60
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.failures = 0
+		self.openedAt = 0
+
+	def allow(self):
+		with self.lock:
+			if self.failures < self.FAILURE_THRESHOLD:
+				return True
+			if time.time() - self.openedAt >= self.RESET_TIMEOUT:
+				self.openedAt = time.time()  # half open, hold back other requests until the trial is done
+				return True
+			return False
+
+	def success(self):
+		with self.lock:
+			self.failures = 0
+
+	def failure(self):
+		with self.lock:
+			self.failures += 1
+			if self.failures >= self.FAILURE_THRESHOLD:
+				self.openedAt = time.time()
+
+	@property
+	def isOpen(self):
+		return self.failures >= self.FAILURE_THRESHOLD
+
+
+class TwistedResponse:
+	"""The parts of requests.Response used by this plugin, for TwistedTransport."""
+	def __init__(self, url, status_code, headers, content):
+		self.url = url
+		self.status_code = status_code
+		self.headers = requests.structures.CaseInsensitiveDict(headers)
+		self.content = content
+
+	def raise_for_status(self):
+		if self.status_code >= 400:
+			raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+	def json(self):
+		return json.loads(self.content)
+
+	def iter_content(self, chunk_size=1):
+		return (self.content[i:i + chunk_size] for i in range(0, len(self.content), chunk_size))
+
+	def close(self):
+		pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+
+class TwistedTransport:
+	"""Non-blocking HTTP on the reactor using twisted.web.client.Agent.
+
+	Connections are kept alive in an HTTPConnectionPool. Must only be used
+	from the reactor thread, request() returns a Deferred firing with a
+	TwistedResponse. Errors are translated to requests exceptions so both
+	transports look the same to the retry and circuit breaker logic.
+	"""
+	def __init__(self, poolsize):
+		from twisted.web.client import Agent, BrowserLikeRedirectAgent, ContentDecoderAgent, GzipDecoder, HTTPConnectionPool
+		self.pool = HTTPConnectionPool(reactor, persistent=True)
+		self.pool.maxPersistentPerHost = poolsize
+		self.agent = ContentDecoderAgent(BrowserLikeRedirectAgent(Agent(reactor, pool=self.pool)), [(b"gzip", GzipDecoder)])
+
+	def request(self, url, params=None, headers=None, timeout=10):
+		from twisted.web.client import PartialDownloadError, readBody
+		from twisted.web.http_headers import Headers
+		if params:
+			url += ("&" if "?" in url else "?") + urlencode(params)
+		rawHeaders = Headers()
+		for name, value in ({"User-Agent": USER_AGENT} | (headers or {})).items():
+			rawHeaders.setRawHeaders(name.encode(), [value.encode()])
+
+		def gotResponse(response):
+			def gotBody(body):
+				return TwistedResponse(url, response.code, {name.decode(): values[-1].decode() for name, values in response.headers.getAllRawHeaders()}, body)
+
+			def partialBody(failure):
+				failure.trap(PartialDownloadError)  # no content-length, the body is complete when the connection closes
+				return gotBody(failure.value.response)
+			return readBody(response).addCallbacks(gotBody, partialBody)
+
+		def translateError(failure):
+			if failure.check(requests.exceptions.RequestException):
+				return failure
+			if failure.check(defer.TimeoutError, defer.CancelledError):
+				raise requests.exceptions.Timeout(f"timeout for url: {url}")
+			raise requests.exceptions.ConnectionError(f"{failure.getErrorMessage()} for url: {url}")
+
+		d = self.agent.request(b"GET", url.encode(), rawHeaders)
+		d.addCallback(gotResponse)
+		d.addTimeout(timeout, reactor)
+		d.addErrback(translateError)
+		return d
+
+
+class PlutoHTTPClient:
+	"""Process-wide HTTP client.
+
+	All outbound requests (API, picons, posters) share one requests.Session so
+	TCP and TLS connections are kept alive and reused per host instead of a
+	new handshake being paid for every request.
+
+	With the twisted engine selected, requests go through TwistedTransport
+	instead. getAsync() then never uses a thread and get() called from a
+	thread waits for the reactor to do the request. While the reactor thread
+	itself waits for a job (see reactorBlocked) requests are used instead.
+	"""
+	POOL_HOSTS = 16  # number of per-host pools kept (boot, service-channels, api, images, ...)
+	RETRIES = 2  # default number of retries after a failed request
+	BACKOFF = 0.5  # seconds before the first retry, doubled for each further retry
+	MAX_BACKOFF = 10
+
+	def __init__(self, poolsize=POOL_SIZE):
+		self.session = requests.Session()
+		self.session.headers["User-Agent"] = USER_AGENT
+		self.adapter = HTTPAdapter(pool_connections=self.POOL_HOSTS, pool_maxsize=poolsize)
+		self.session.mount("https://", self.adapter)
+		self.session.mount("http://", self.adapter)
+		self.lock = threading.Lock()
+		self.breakers = {}
+		self.retries = 0
+		self.poolsize = poolsize
+		self.twisted = None
+		self.blocked = 0
+
+	def useTwisted(self):
+		try:
+			return config.plugins.plutotv.http_engine.value == "twisted" and not self.blocked
+		except AttributeError:
+			return False
+
+	@contextmanager
+	def reactorBlocked(self):
+		"""Bypass the twisted engine while the reactor thread runs a blocking job.
+
+		Threads started by that job could not hand their requests to the
+		reactor until the job has finished. Does nothing in other threads.
+		"""
+		blocked = isInIOThread()
+		if blocked:
+			with self.lock:
+				self.blocked += 1
+		try:
+			yield
+		finally:
+			if blocked:
+				with self.lock:
+					self.blocked -= 1
+
+	def _twistedRequest(self, url, params, headers, timeout):
+		if self.twisted is None:
+			self.twisted = TwistedTransport(self.poolsize)
+		return self.twisted.request(url, params, headers, timeout)
+
+	def _send(self, url, params, headers, timeout, **kwargs):
+		if self.useTwisted() and not isInIOThread():
+			return threads.blockingCallFromThread(reactor, self._twistedRequest, url, params, headers, timeout)
+		return self.session.get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+
+	@staticmethod
+	def circuitOpenError(url, breaker):
+		return CircuitOpenError(f"{urlsplit(url).netloc} is unavailable, not retrying until {time.strftime('%H:%M:%S', time.localtime(breaker.openedAt + breaker.RESET_TIMEOUT))}")
+
+	def breaker(self, url):
+		host = urlsplit(url).netloc
+		with self.lock:
+			if (breaker := self.breakers.get(host)) is None:
+				breaker = self.breakers[host] = CircuitBreaker()
+			return breaker
+
+	def backoff(self, attempt, retryAfter=None):
+		try:
+			delay = float(retryAfter)
+		except (TypeError, ValueError):
+			delay = self.BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+		return min(delay, self.MAX_BACKOFF)
+
+	def get(self, url, params=None, headers=None, timeout=10, retries=None, **kwargs):
+		"""GET with retries and a circuit breaker per host.
+
+		Connection errors, timeouts, 429 and 5xx responses are retried with
+		jittered exponential backoff. The last response is returned if it is
+		still a 429 or 5xx, so callers see it in raise_for_status.
+		"""
+		retries = self.RETRIES if retries is None else retries
+		breaker = self.breaker(url)
+		for attempt in range(retries + 1):
+			if not breaker.allow():
+				raise self.circuitOpenError(url, breaker)
+			retryAfter = None
+			try:
+				response = self._send(url, params, headers, timeout, **kwargs)
+			except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+				breaker.failure()
+				if attempt == retries:
+					raise
+				print(f"[PlutoHTTPClient] {e}, retrying")
+			else:
+				if response.status_code != 429 and response.status_code < 500:
+					breaker.success()
+					return response
+				breaker.failure()
+				if attempt == retries:
+					return response
+				retryAfter = response.headers.get("Retry-After")
+				response.close()
+			with self.lock:
+				self.retries += 1
+			time.sleep(self.backoff(attempt, retryAfter))
+
+	def getAsync(self, url, params=None, headers=None, timeout=10, retries=None):
+		"""Like get() but returns a Deferred. Call from the reactor thread.
+
+		With the requests engine the request is run in a pool thread.
+		"""
+		if not self.useTwisted():
+			return threads.deferToThread(self.get, url, params, headers, timeout, retries)
+		retries = self.RETRIES if retries is None else retries
+		breaker = self.breaker(url)
+
+		def attempt(n):
+			if not breaker.allow():
+				return defer.fail(self.circuitOpenError(url, breaker))
+
+			def gotResponse(response):
+				if response.status_code != 429 and response.status_code < 500:
+					breaker.success()
+					return response
+				breaker.failure()
+				return response if n == retries else retry(n, response.headers.get("Retry-After"))
+
+			def failed(failure):
+				failure.trap(requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+				breaker.failure()
+				return failure if n == retries else retry(n)
+			return self._twistedRequest(url, params, headers, timeout).addCallbacks(gotResponse, failed)
+
+		def retry(n, retryAfter=None):
+			with self.lock:
+				self.retries += 1
+			return task.deferLater(reactor, self.backoff(n, retryAfter), attempt, n + 1)
+		return attempt(0)
+
+	def stats(self):
+		"""Return request and connection counters summed over all host pools."""
+		requestCount = connectionCount = 0
+		pools = self.adapter.poolmanager.pools
+		for key in list(pools.keys()):
+			if (pool := pools.get(key)) is not None:
+				requestCount += pool.num_requests
+				connectionCount += pool.num_connections
+		with self.lock:
+			openCircuits = [host for host, breaker in self.breakers.items() if breaker.isOpen]
+		return {"requests": requestCount, "connections": connectionCount, "reused": max(requestCount - connectionCount, 0), "retries": self.retries, "open": ", ".join(openCircuits) or "-"}
+
+
+httpClient = PlutoHTTPClient()
+
+
+class SingleFlight:
+	"""Coalesce concurrent calls with the same key into one call.
+
+	The first caller for a key runs the function, callers arriving while it
+	is in flight wait for it and share its result (or exception). With the
+	twisted engine the reactor thread never waits, the leader needs it to do
+	its request, so there the function is run again instead.
+	"""
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.calls = {}
+		self.coalesced = 0
+
+	def do(self, key, func, *args, **kwargs):
+		with self.lock:
+			if (call := self.calls.get(key)) and isInIOThread() and httpClient.useTwisted():
+				call = leader = None
+			elif call:
+				self.coalesced += 1
+				leader = False
+			else:
+				call = self.calls[key] = {"event": threading.Event(), "result": None, "error": None}
+				leader = True
+		if call is None:
+			return func(*args, **kwargs)
+		if leader:
+			try:
+				call["result"] = func(*args, **kwargs)
+			except Exception as e:
+				call["error"] = e
+			finally:
+				with self.lock:
+					del self.calls[key]
+				call["event"].set()
+		else:
+			call["event"].wait()
+		if call["error"] is not None:
+			raise call["error"]
+		return call["result"]
+
+
+class ResponseCache:
+	"""Size-bounded LRU cache for decoded JSON responses.
+
+	Sizes are approximated by the length of the response payload. Entries
+	are kept after their lifetime has passed so they can be revalidated with
+	ETag/If-Modified-Since, and are swept once older than maxAge.
+	"""
+	SWEEP_INTERVAL = 60
+
+	def __init__(self, maxBytes, maxAge=24 * 60 * 60):
+		self.lock = threading.Lock()
+		self.entries = OrderedDict()  # key: [data, stored, size, etag, lastModified]
+		self.maxBytes = maxBytes
+		self.maxAge = maxAge
+		self.size = 0
+		self.lastSweep = time.time()
+		self.hits = 0
+		self.misses = 0
+		self.revalidated = 0
+		self.evictions = 0
+
+	def get(self, key, life):
+		"""Return (data, entry). data is None unless the entry is still fresh."""
+		with self.lock:
+			if entry := self.entries.get(key):
+				self.entries.move_to_end(key)
+				if entry[1] > time.time() - life:
+					self.hits += 1
+					return entry[0], entry
+			self.misses += 1
+			return None, entry
+
+	def put(self, key, data, size, etag=None, lastModified=None):
+		with self.lock:
+			if old := self.entries.pop(key, None):
+				self.size -= old[2]
+			if size > self.maxBytes:
+				return
+			self.entries[key] = [data, time.time(), size, etag, lastModified]
+			self.size += size
+			while self.size > self.maxBytes:
+				__, old = self.entries.popitem(last=False)
+				self.size -= old[2]
+				self.evictions += 1
+			if time.time() - self.lastSweep > self.SWEEP_INTERVAL:
+				self._sweep()
+
+	def revalidate(self, key):
+		"""Mark an entry fresh again after a 304 Not Modified response."""
+		with self.lock:
+			if entry := self.entries.get(key):
+				entry[1] = time.time()
+				self.revalidated += 1
+
+	def sweep(self):
+		with self.lock:
+			self._sweep()
+
+	def _sweep(self):
+		now = self.lastSweep = time.time()
+		for key in [key for key, entry in self.entries.items() if entry[1] < now - self.maxAge]:
+			self.size -= self.entries.pop(key)[2]
+
+	def clear(self):
+		with self.lock:
+			self.entries.clear()
+			self.size = 0
+
+	def stats(self):
+		with self.lock:
+			return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses, "revalidated": self.revalidated, "evictions": self.evictions}
+
+
+class PipelineStats:
+	"""Time spent and counters of each stage of a bouquet update, per country.
+
+	Stages can be added from any thread while a run is active. Finished
+	runs are stored in PIPELINE_STATS_FILE, which keeps the last KEEP_RUNS.
+	"""
+	KEEP_RUNS = 20
+
+	def __init__(self, filename=PIPELINE_STATS_FILE):
+		self.filename = filename
+		self.lock = threading.Lock()
+		self.run = None
+		self.started = 0.0
+
+	def begin(self, silent=False):
+		with self.lock:
+			self.run = {"time": int(time.time()), "silent": silent, "countries": {}}
+			self.started = time.perf_counter()
+
+	def add(self, cc, stage, seconds, calls=1, **counters):
+		with self.lock:
+			if self.run is not None:
+				entry = self.run["countries"].setdefault(cc or "all", {}).setdefault(stage, {"seconds": 0.0, "calls": 0})
+				entry["seconds"] += seconds
+				entry["calls"] += calls
+				for name, value in counters.items():
+					entry[name] = entry.get(name, 0) + value
+
+	@contextmanager
+	def stage(self, cc, stage, **counters):
+		begin = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.add(cc, stage, time.perf_counter() - begin, **counters)
+
+	def end(self):
+		with self.lock:
+			run, self.run = self.run, None
+		if run:
+			run["seconds"] = round(time.perf_counter() - self.started, 3)
+			for stages in run["countries"].values():
+				for entry in stages.values():
+					entry["seconds"] = round(entry["seconds"], 3)
+			runs = (self.load() + [run])[-self.KEEP_RUNS:]
+			try:
+				with open(self.filename + ".tmp", "w") as f:
+					json.dump(runs, f)
+				os.replace(self.filename + ".tmp", self.filename)
+			except OSError as e:
+				print(f"[PlutoDownload] error saving stats: {e}")
+
+	def load(self):
+		try:
+			with open(self.filename, "r") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return []
+
+	def summary(self):
+		"""(date, text) describing the last run, or None."""
+		if not (runs := self.load()):
+			return None
+		run = runs[-1]
+		lines = []
+		for cc, stages in run["countries"].items():
+			lines.append("%s: %s" % (COUNTRY_NAMES.get(cc, cc) if cc != "all" else _("All"), ", ".join("%s %.1fs" % (stage, entry["seconds"]) for stage, entry in stages.items())))
+		return time.strftime("%Y-%m-%d %H:%M", time.localtime(run["time"])), _("Duration %.1fs") % run["seconds"] + "\n" + "\n".join(lines)
+
+
+pipelineStats = PipelineStats()
+
+PROFILE_RUNS = 10  # profiles kept per profiled function
+PROFILE_MODES = {"1": "cpu", "yes": "cpu", "true": "cpu", "on": "cpu", "cpu": "cpu", "memory": "memory", "0": "", "no": "", "false": "", "off": ""}  # values of PLUTOTV_PROFILE
+
+
+def profilingMode():
+	"""'cpu', 'memory' or '' from the PLUTOTV_PROFILE environment variable or the setup.
+
+	Unknown values of PLUTOTV_PROFILE are ignored, the setup applies then.
+	"""
+	if mode := os.environ.get("PLUTOTV_PROFILE", "").strip().lower():
+		if mode in PROFILE_MODES:
+			return PROFILE_MODES[mode]
+		print(f"[PlutoTV] unknown PLUTOTV_PROFILE value {mode!r} ignored")
+	try:
+		return "" if config.plugins.plutotv.profiling.value == "off" else config.plugins.plutotv.profiling.value
+	except AttributeError:
+		return ""
+
+
+def profileFolder():
+	try:
+		if (location := config.plugins.plutotv.datalocation.value) and os.path.exists(location):
+			return os.path.join(location, "PlutoTV", "profiles")
+	except AttributeError:
+		pass
+	return ""
+
+
+profileLock = threading.Lock()  # one profile at a time, Python 3.12+ refuses a second one
+
+
+def profiled(name):
+	"""Run the decorated function under cProfile when profiling is enabled.
+
+	The stats are written to the profiles folder of the data location as
+	<name>-<timestamp>.prof with a readable .txt summary, and in memory
+	mode a .mem file with the largest allocations. Only the calling thread
+	is profiled. While another profile is running the function runs
+	unprofiled.
+	"""
+	def decorator(func):
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			if not (mode := profilingMode()) or not (folder := profileFolder()):
+				return func(*args, **kwargs)
+			if not profileLock.acquire(blocking=False):
+				print(f"[PlutoTV] another profile is running, {name} is not profiled")
+				return func(*args, **kwargs)
+			try:
+				profile = cProfile.Profile()
+				try:
+					profile.enable()
+				except ValueError as e:  # another profiling tool is active
+					print(f"[PlutoTV] {name} is not profiled: {e}")
+					return func(*args, **kwargs)
+				tracing = mode == "memory" and not tracemalloc.is_tracing()
+				if tracing:
+					tracemalloc.start()
+				try:
+					return func(*args, **kwargs)
+				finally:
+					profile.disable()
+					snapshot = tracemalloc.take_snapshot() if mode == "memory" else None
+					if tracing:
+						tracemalloc.stop()
+					saveProfile(folder, name, profile, snapshot)
+			finally:
+				profileLock.release()
+		return wrapper
+	return decorator
+
+
+def saveProfile(folder, name, profile, snapshot=None):
+	try:
+		os.makedirs(folder, exist_ok=True)
+		filename = os.path.join(folder, "%s-%s" % (name, time.strftime("%Y%m%d-%H%M%S")))
+		profile.dump_stats(filename + ".prof")
+		with open(filename + ".txt", "w") as f:
+			pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(50)
+		if snapshot:
+			with open(filename + ".mem", "w") as f:
+				f.write("\n".join(str(stat) for stat in snapshot.statistics("lineno")[:50]))
+		print(f"[PlutoDownload] profile of {name} written to {filename}.prof")
+		runs = sorted(entry[:-5] for entry in os.listdir(folder) if entry.startswith(name + "-") and entry.endswith(".prof"))
+		for old in runs[:-PROFILE_RUNS]:
+			for extension in (".prof", ".txt", ".mem"):
+				if os.path.exists(path := os.path.join(folder, old + extension)):
+					os.remove(path)
+	except Exception as e:
+		print(f"[PlutoDownload] error saving profile of {name}: {e}")
+
+
+@lru_cache(maxsize=8192)
+def isoTimestamp(datestring):
+	"""Epoch seconds of an ISO-8601 UTC time such as 2024-01-31T18:30:00.000Z.
+	Pluto starts almost always fall on the same few slots, so results are memoized."""
+	if len(datestring) >= 20 and datestring[-1] == "Z" and datestring[10] == "T" and datestring[19] in ".Z":
+		return calendar.timegm((int(datestring[:4]), int(datestring[5:7]), int(datestring[8:10]), int(datestring[11:13]), int(datestring[14:16]), int(datestring[17:19]), 0, 0, 0))
+	return calendar.timegm(datetime.datetime.fromisoformat(datestring.replace("Z", "+00:00")).utctimetuple())
+
+
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def iterJSONArray(chunks, key=None):
+	"""Yield the elements of a JSON array of objects while it downloads.
+
+	chunks is an iterable of bytes. With key, the array is the value of that
+	member of the top-level object, otherwise the document must be an array.
+	Only the element being decoded is held in memory, not the whole document.
+	"""
+	decoder = json.JSONDecoder()
+	utf8 = codecs.getincrementaldecoder("utf-8")()
+	chunks = iter(chunks)
+	buf = ""
+	pos = 0
+
+	def read(size):  # read until at least size characters are buffered after pos
+		nonlocal buf, pos
+		buf = buf[pos:]
+		pos = 0
+		while len(buf) < size:
+			if (chunk := next(chunks, None)) is None:
+				buf += utf8.decode(b"", final=True)
+				return False
+			buf += utf8.decode(chunk)
+		return True
+
+	opening = re.compile(r'"%s"\s*:\s*\[' % re.escape(key)) if key else re.compile(r"\s*\[")
+	while not (match := opening.search(buf) if key else opening.match(buf)):
+		if not key and buf.strip():
+			return  # not an array
+		if not read(len(buf) + 1):
+			return
+	pos = match.end()
+	while True:
+		while pos < len(buf) and buf[pos] in " \t\r\n,":
+			pos += 1
+		if pos >= len(buf):
+			if not read(1):
+				return
+			continue
+		if buf[pos] == "]":
+			return
+		try:
+			obj, end = decoder.raw_decode(buf, pos)
+		except ValueError:
+			if read(2 * (len(buf) - pos)):  # element is incomplete, grow the buffer geometrically
+				continue
+			obj, end = decoder.raw_decode(buf, pos)  # raises if the document is truncated
+		pos = end
+		yield obj
 
 
 class PlutoRequest:
@@ -100,15 +746,156 @@ class PlutoRequest:
 	LEGACY_CHANNELS_URL = BASE_API + "/v2/channels.json"
 	LEGACY_GUIDE_URL = BASE_API + "/v2/channels"
 
+	API_URLS = ("BASE_API", "BOOT_URL", "CHANNELS_URL", "CATEGORIES_URL", "TIMELINES_URL", "STITCHER_FALLBACK", "BASE_VOD", "SEASON_VOD", "LEGACY_CHANNELS_URL", "LEGACY_GUIDE_URL")
+
 	# for URL insertion at runtime
 	PLUTO_SCHEMA = "pluto%3a//"
 
+	REQUEST_CACHE_SIZE = 8 * 1024 * 1024  # bytes of response payload kept by getURL
+	CHUNK_RETRIES = 2  # extra rounds for timeline chunks that failed
+	GUIDE_WINDOW = 1440  # minutes of guide fetched per timelines request
+
+	API_REPROBE_INTERVAL = 7 * 24 * 60 * 60  # how long a country stays on the legacy API before the new API is tried again
+
+	TOKEN_REFRESH_MARGIN = 5 * 60  # renew tokens this long before boot() would treat them as expired
+	TOKEN_RETRY_INTERVAL = 5 * 60  # wait between renewal attempts after a failed boot
+
 	def __init__(self):
-		self.session = requests.Session()
+		self.session = httpClient
 		self.bootCache = {}
-		self.requestCache = {}
+		self.requestCache = ResponseCache(self.REQUEST_CACHE_SIZE)
 		self._sid = str(uuid.uuid1().hex)
 		self._deviceId = str(uuid.uuid4().hex)
+		self.refreshTimer = None
+		self.lastTokenRefresh = 0
+		self.streamTemplates = {}
+		self.zapTimes = deque(maxlen=500)
+		self.lock = threading.RLock()  # guards bootCache, requestCache has its own lock
+		self.inflight = SingleFlight()
+		self.hits = 0  # boot cache counters
+		self.misses = 0
+		self.baseURL = None
+		self.loadBootCache()
+		self.apiRoutes = self.loadAPIRoutes()
+		if base := os.environ.get("PLUTOTV_BASE_URL"):
+			self.setBaseURL(base)
+
+	def setBaseURL(self, base=None):
+		"""Send all API requests to base (scheme://host[:port]) instead of the Pluto hosts,
+		e.g. a local stand-in server for load tests. None restores the Pluto hosts.
+
+		Tokens, API routes and guide state of the other hosts are kept in
+		separate files, see stateFile.
+		"""
+		for name in self.API_URLS:
+			if base:
+				setattr(self, name, re.sub(r"^https?://[^/]+", base.rstrip("/"), getattr(type(self), name)))
+			else:
+				self.__dict__.pop(name, None)
+		self.baseURL = base or None
+		with self.lock:
+			self.bootCache = {}  # tokens and routes of the other hosts
+			self.streamTemplates = {}
+			self.apiRoutes = self.loadAPIRoutes()
+		self.loadBootCache()
+		self.requestCache.clear()
+		print(f"[PlutoTV] API base URL {base or 'restored'}")
+
+	def stateFile(self, filename):
+		"""filename, or a separate one while a base URL is set so the state of
+		a stand-in server never ends up in the files used with the Pluto hosts."""
+		if not self.baseURL:
+			return filename
+		root, ext = os.path.splitext(filename)
+		return f"{root}.baseurl{ext}"
+
+	def stats(self):
+		stats = self.requestCache.stats()
+		with self.lock:
+			stats["hits"] += self.hits
+			stats["misses"] += self.misses
+		stats["coalesced"] = self.inflight.coalesced
+		return stats
+
+	def loadBootCache(self):
+		"""Reload boot responses saved by a previous session, skipping expired tokens."""
+		try:
+			with open(self.stateFile(BOOT_CACHE_FILE), "r") as f:
+				cache = json.load(f)
+		except (OSError, ValueError):
+			return
+		now = time.time()
+		with self.lock:
+			self.bootCache.update({country: entry for country, entry in cache.items() if isinstance(entry, dict) and now < entry.get("exp", 0) - 60})
+
+	def saveBootCache(self):
+		with self.lock:
+			data = json.dumps(self.bootCache)
+		filename = self.stateFile(BOOT_CACHE_FILE)
+		try:
+			os.makedirs(os.path.dirname(filename), exist_ok=True)  # create config folder recursive if not exists
+			with open(filename + ".tmp", "w") as f:
+				f.write(data)
+			os.replace(filename + ".tmp", filename)
+		except OSError as e:
+			print(f"[PlutoTV] error saving boot cache: {e}")
+
+	def loadAPIRoutes(self):
+		try:
+			with open(self.stateFile(API_ROUTES_FILE), "r") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return {}
+
+	def useLegacyAPI(self, country):
+		"""True if the country is known to be on the legacy API and is not due for a re-probe."""
+		with self.lock:
+			route = self.apiRoutes.get(country, {})
+		return route.get("api") == "legacy" and time.time() - route.get("checked", 0) < self.API_REPROBE_INTERVAL
+
+	def setAPIRoute(self, country, api):
+		with self.lock:
+			if api == "service" and self.apiRoutes.get(country, {}).get("api") == api:
+				return  # nothing changed, save a write
+			self.apiRoutes[country] = {"api": api, "checked": int(time.time())}
+			data = json.dumps(self.apiRoutes)
+		print(f"[PlutoTV] {country} uses the {api} API")
+		filename = self.stateFile(API_ROUTES_FILE)
+		try:
+			os.makedirs(os.path.dirname(filename), exist_ok=True)  # create config folder recursive if not exists
+			with open(filename, "w") as f:
+				f.write(data)
+		except OSError as e:
+			print(f"[PlutoTV] error saving API routes: {e}")
+
+	@staticmethod
+	def tokenCountries():
+		return list(dict.fromkeys([x for x in getselectedcountries() if x] + [config.plugins.plutotv.country.value]))
+
+	def startTokenRefresh(self):
+		"""Keep the tokens of the selected countries fresh so zapping never waits on boot.pluto.tv."""
+		if self.refreshTimer is None:
+			self.refreshTimer = eTimer()
+			self.refreshTimer.callback.append(self.refreshTokens)
+		self.scheduleTokenRefresh()
+
+	def scheduleTokenRefresh(self, *args):
+		now = time.time()
+		due = []
+		for country in self.tokenCountries():
+			expires = self.bootCache.get(country, {}).get("exp", 0) - 60 - self.TOKEN_REFRESH_MARGIN
+			due.append(expires if expires > now else self.lastTokenRefresh + self.TOKEN_RETRY_INTERVAL)
+		if due:
+			self.refreshTimer.startLongTimer(max(int(min(due) - now), 1))
+
+	def refreshTokens(self):
+		threads.deferToThread(self.renewTokens).addBoth(self.scheduleTokenRefresh)
+
+	def renewTokens(self):
+		self.lastTokenRefresh = time.time()
+		for country in self.tokenCountries():
+			if self.bootCache.get(country, {}).get("exp", 0) - 60 - self.TOKEN_REFRESH_MARGIN <= time.time():
+				self.boot(country, force=True)
 
 	@staticmethod
 	def _tokenExpiry(token):
@@ -123,14 +910,30 @@ class PlutoRequest:
 		except Exception:
 			return 0
 
-	def boot(self, country=None):
-		"""Acquire token via boot.pluto.tv/v4/start (same as pluto-for-channels)."""
+	def _cachedBoot(self, country):
+		with self.lock:
+			if (entry := self.bootCache.get(country)) and time.time() < entry["exp"] - 60:
+				return entry["response"]
+		return None
+
+	def boot(self, country=None, force=False):
+		"""Acquire token via boot.pluto.tv/v4/start (same as pluto-for-channels).
+
+		Concurrent callers for the same country share a single request. On
+		the reactor thread (a zap) a failed request is not retried.
+		"""
 		country = country or config.plugins.plutotv.country.value
-		now = time.time()
+		if not force and (resp := self._cachedBoot(country)) is not None:
+			with self.lock:
+				self.hits += 1
+			return resp
+		with self.lock:
+			self.misses += 1
+		return self.inflight.do((country, self.BOOT_URL, ()), self._boot, country, force)
 
-		if country in self.bootCache:
-			if now < self.bootCache[country]["exp"] - 60:
-				return self.bootCache[country]["response"]
+	def _boot(self, country, force):
+		if not force and (resp := self._cachedBoot(country)) is not None:
+			return resp  # renewed by a call that finished just before this one started
 
 		headers = {
 			'authority': 'boot.pluto.tv',
@@ -165,21 +968,28 @@ class PlutoRequest:
 		if ip:
 			headers['X-Forwarded-For'] = ip
 
+		retries = 0 if isInIOThread() and not self.session.blocked else None  # a zap, don't hold up the GUI with retries
+		begin = time.perf_counter()
 		try:
-			response = requests.get(self.BOOT_URL, headers=headers, params=params, timeout=10)
+			response = self.session.get(self.BOOT_URL, headers=headers, params=params, timeout=10, retries=retries)
 			response.raise_for_status()
 			resp = response.json()
-			self.bootCache[country] = {
+			entry = {
 				"response": resp,
 				"exp": self._tokenExpiry(resp.get("sessionToken", "")),
 				"stitcherUrl": resp.get("servers", {}).get("stitcher", self.STITCHER_FALLBACK),
 				"stitcherParams": resp.get("stitcherParams", ""),
 			}
-			print(f"[PlutoTV] New token for {country}, stitcher={self.bootCache[country]['stitcherUrl']}")
+			with self.lock:
+				self.bootCache[country] = entry
+			print(f"[PlutoTV] New token for {country}, stitcher={entry['stitcherUrl']}")
+			self.saveBootCache()
 			return resp
 		except Exception as e:
 			print(f"[PlutoTV] boot error: {e}")
 			return {}
+		finally:
+			pipelineStats.add(country, "boot", time.perf_counter() - begin)
 
 	def _authHeaders(self, country=None):
 		"""Build authorization headers for service-channels API."""
@@ -198,25 +1008,36 @@ class PlutoRequest:
 			headers['X-Forwarded-For'] = ip
 		return headers
 
+	def streamTemplate(self, country, escaped=False):
+		"""Return the (prefix, suffix) around the channel id of a stream URL.
+
+		The template is built once per boot response, so building a stream
+		URL while zapping is a string concatenation. escaped returns it with
+		":" already replaced for use in a service reference.
+		"""
+		cache = self.bootCache.get(country)
+		if not cache or time.time() >= cache["exp"] - 60:
+			self.boot(country)
+			cache = self.bootCache.get(country, {})
+		if not (template := self.streamTemplates.get(country)) or template[0] is not cache:  # new token
+			token = cache.get('response', {}).get('sessionToken', '')
+			stitcherUrl = cache.get('stitcherUrl', self.STITCHER_FALLBACK)
+			stitcherParams = cache.get('stitcherParams', '')
+			prefix = f"{stitcherUrl}/v2/stitch/hls/channel/"
+			suffix = f"/master.m3u8?jwt={token}&masterJWTPassthrough=true"
+			if stitcherParams:
+				suffix += f"&{stitcherParams}"
+			template = self.streamTemplates[country] = (cache, prefix, suffix, prefix.replace(":", "%3a"), suffix.replace(":", "%3a"))
+		return template[3:] if escaped else template[1:3]
+
 	def buildStreamURL(self, channel_id, country=None):
 		"""Build authenticated stitcher stream URL.
 
 		Uses the stitcher URL and stitcherParams from the boot API response
 		so each country is routed to the correct CDN endpoint.
 		"""
-		country = country or config.plugins.plutotv.country.value
-		self.boot(country)
-		cache = self.bootCache.get(country, {})
-		token = cache.get('response', {}).get('sessionToken', '')
-		stitcherUrl = cache.get('stitcherUrl', self.STITCHER_FALLBACK)
-		stitcherParams = cache.get('stitcherParams', '')
-		url = (
-			f"{stitcherUrl}/v2/stitch/hls/channel/{channel_id}/master.m3u8"
-			f"?jwt={token}&masterJWTPassthrough=true"
-		)
-		if stitcherParams:
-			url += f"&{stitcherParams}"
-		return url
+		prefix, suffix = self.streamTemplate(country or config.plugins.plutotv.country.value)
+		return prefix + channel_id + suffix
 
 	def _apiHeaders(self, country=None):
 		"""Build authorization headers for api.pluto.tv endpoints (VOD)."""
@@ -252,22 +1073,60 @@ class PlutoRequest:
 	def getURL(self, url, param=None, header={"User-agent": USER_AGENT}, life=60 * 15, country=None):
 		if param is None:
 			param = {}
-		now = time.time()
 		country = country or config.plugins.plutotv.country.value
-		if country not in self.requestCache:
-			self.requestCache[country] = {}
-		if url in self.requestCache[country] and self.requestCache[country][url][1] > (now - life):
-			return self.requestCache[country][url][0]
+		key = (country, url, tuple(sorted(param.items())))
+		data, entry = self.requestCache.get(key, life)
+		if data is not None:
+			return data
+		return self.inflight.do(key, self._getURL, key, url, param, header, entry)
+
+	def _getURL(self, key, url, param, header, entry):
+		header = dict(header)
+		if entry:  # expired, ask the server whether it changed
+			if entry[3]:
+				header["If-None-Match"] = entry[3]
+			if entry[4]:
+				header["If-Modified-Since"] = entry[4]
 		try:
-			req = requests.get(url, param, headers=header, timeout=10)
+			req = self.session.get(url, param, headers=header, timeout=10)
+			if req.status_code == 304 and entry:
+				req.close()
+				self.requestCache.revalidate(key)
+				return entry[0]
 			req.raise_for_status()
 			response = req.json()
+			self.requestCache.put(key, response, len(req.content), req.headers.get("ETag"), req.headers.get("Last-Modified"))
 			req.close()
-			self.requestCache[country][url] = (response, now)
 			return response
 		except Exception:
 			return {}
 
+	def getURLAsync(self, url, param=None, header={"User-agent": USER_AGENT}, life=60 * 15, country=None):
+		"""Deferred version of getURL. Call from the reactor thread."""
+		if param is None:
+			param = {}
+		country = country or config.plugins.plutotv.country.value
+		key = (country, url, tuple(sorted(param.items())))
+		data, entry = self.requestCache.get(key, life)
+		if data is not None:
+			return defer.succeed(data)
+		header = dict(header)
+		if entry:
+			if entry[3]:
+				header["If-None-Match"] = entry[3]
+			if entry[4]:
+				header["If-Modified-Since"] = entry[4]
+
+		def gotResponse(req):
+			if req.status_code == 304 and entry:
+				self.requestCache.revalidate(key)
+				return entry[0]
+			req.raise_for_status()
+			response = req.json()
+			self.requestCache.put(key, response, len(req.content), req.headers.get("ETag"), req.headers.get("Last-Modified"))
+			return response
+		return self.session.getAsync(url, param, header, 10).addCallback(gotResponse).addErrback(lambda failure: {})
+
 	def buildVodStreamURL(self, vod_url, country=None):
 		"""Rewrite a VOD stitched URL to use the correct stitcher host + JWT auth.
 
@@ -309,34 +1168,74 @@ class PlutoRequest:
 		country = country or config.plugins.plutotv.country.value
 		return self.getURL(self.BASE_VOD, header=self._apiHeaders(country), life=60 * 60, country=country)
 
+	def getOndemandAsync(self, country=None):
+		country = country or config.plugins.plutotv.country.value
+		if self._cachedBoot(country) is not None:
+			headers = defer.succeed(self._apiHeaders(country))
+		else:
+			headers = threads.deferToThread(self._apiHeaders, country)  # boot is blocking
+		return headers.addCallback(lambda header: self.getURLAsync(self.BASE_VOD, header=header, life=60 * 60, country=country))
+
+	@staticmethod
+	def fetchConcurrency():
+		try:
+			return max(int(config.plugins.plutotv.fetch_concurrency.value), 1)
+		except (AttributeError, ValueError):
+			return 1
+
+	def _getData(self, url, params, headers):
+		response = self.session.get(url, params=params, headers=headers, timeout=10)
+		response.raise_for_status()
+		return response.json().get("data", [])
+
+	def _getChannelList(self, country, headers):
+		"""Raw channel list from v2/guide/channels, None if the request failed."""
+		params = {'channelIds': '', 'offset': '0', 'limit': '1000', 'sort': 'number:asc'}
+		try:
+			with pipelineStats.stage(country, "channels"):
+				return self._getData(self.CHANNELS_URL, params, headers)
+		except Exception as e:
+			print(f"[PlutoTV] getChannels new API error for {country}: {e}")
+			return None
+
+	def _getCategories(self, country, headers):
+		params = {'channelIds': '', 'offset': '0', 'limit': '1000', 'sort': 'number:asc'}
+		try:
+			with pipelineStats.stage(country, "categories"):
+				return self._getData(self.CATEGORIES_URL, params, headers)
+		except Exception:
+			return []
+
 	def getChannels(self, country=None):
 		"""Fetch channels via v2/guide/channels + categories, returned in legacy format.
 
 		Falls back to the legacy api.pluto.tv endpoint if the new API returns
-		no data (some countries like Finland are not on the new API).
+		no data (some countries like Finland are not on the new API). That is
+		only remembered when the new API answered, after an error the legacy
+		API is used for this run only.
+		Channels and categories are requested in parallel unless fetch
+		concurrency is switched off.
 		"""
 		country = country or config.plugins.plutotv.country.value
+		if self.useLegacyAPI(country):
+			return self._getChannelsLegacy(country)
 		headers = self._authHeaders(country)
-		params = {'channelIds': '', 'offset': '0', 'limit': '1000', 'sort': 'number:asc'}
 
-		try:
-			response = self.session.get(self.CHANNELS_URL, params=params, headers=headers, timeout=10)
-			response.raise_for_status()
-			channel_list = response.json().get("data", [])
-		except Exception as e:
-			print(f"[PlutoTV] getChannels new API error for {country}: {e}")
-			channel_list = []
+		if self.fetchConcurrency() > 1:
+			with ThreadPoolExecutor(max_workers=2) as executor:
+				categoriesFuture = executor.submit(self._getCategories, country, headers)
+				channel_list = self._getChannelList(country, headers)
+				cat_data = categoriesFuture.result() if channel_list else []
+		else:
+			channel_list = self._getChannelList(country, headers)
+			cat_data = self._getCategories(country, headers) if channel_list else []
 
 		if not channel_list:
-			print(f"[PlutoTV] getChannels: new API returned no channels for {country}, trying legacy API")
-			return self._getChannelsLegacy(country)
-
-		try:
-			response = self.session.get(self.CATEGORIES_URL, params=params, headers=headers, timeout=10)
-			response.raise_for_status()
-			cat_data = response.json().get("data", [])
-		except Exception:
-			cat_data = []
+			print(f"[PlutoTV] getChannels: new API {'returned no channels' if channel_list is not None else 'unavailable'} for {country}, trying legacy API")
+			if (channels := self._getChannelsLegacy(country)) and channel_list is not None:
+				self.setAPIRoute(country, "legacy")
+			return channels
+		self.setAPIRoute(country, "service")
 
 		categories = {}
 		for elem in cat_data:
@@ -367,7 +1266,7 @@ class PlutoRequest:
 		params = {'sid': self._sid, 'deviceId': self._deviceId}
 		headers = self._legacyHeaders(country)
 		try:
-			response = requests.get(self.LEGACY_CHANNELS_URL, params=params, headers=headers, timeout=10)
+			response = self.session.get(self.LEGACY_CHANNELS_URL, params=params, headers=headers, timeout=10)
 			response.raise_for_status()
 			channels = response.json()
 			if isinstance(channels, list):
@@ -379,82 +1278,145 @@ class PlutoRequest:
 			print(f"[PlutoTV] getChannels legacy API error for {country}: {e}")
 			return []
 
-	def getBaseGuide(self, start, stop, country=None):
+	def _getTimelineChunk(self, index, group, start, duration, headers, country, emit, channel_lookup):
+		"""Fetch one group of channel timelines and pass each channel to emit
+		while the response is parsed. Returns (index, count, seconds, ok)."""
+		params = {
+			'start': start,
+			'channelIds': ','.join(group),
+			'duration': str(duration),
+		}
+		begin = time.time()
+		count = 0
+		ok = True
+		try:
+			with self.session.get(self.TIMELINES_URL, params=params, headers=headers, timeout=10, stream=True) as response:
+				response.raise_for_status()
+				for entry in iterJSONArray(response.iter_content(JSON_CHUNK_SIZE), "data"):
+					ch_id = entry.get('channelId', '')
+					ch_data = channel_lookup.get(ch_id, {})
+					emit({
+						'_id': ch_id,
+						'number': ch_data.get('number', 0),
+						'name': ch_data.get('name', ''),
+						'timelines': entry.get('timelines', []),
+					})
+					count += 1
+		except Exception as e:
+			print(f"[PlutoTV] getBaseGuide new API error for {country} (chunk {index + 1}): {e}")
+			ok = False
+		pipelineStats.add(country, "timelines", time.time() - begin, channels=count, failed=int(not ok))
+		return index, count, time.time() - begin, ok
+
+	def getBaseGuide(self, start, stop, country=None, duration=1440, callback=None, channels=None):
 		"""Fetch guide data via v2/guide/timelines, returned in legacy format.
 
 		Falls back to the legacy api.pluto.tv endpoint if the new API returns
 		no data (some countries like Finland are not on the new API).
+		duration is at most GUIDE_WINDOW minutes, longer guides are fetched
+		window by window. Timeline chunks are fetched with bounded
+		concurrency and merged back in channel order.
+
+		If callback is given, responses are parsed as they download and each
+		channel is passed to callback (from the fetching threads, in no
+		particular order) instead of being collected in the returned list.
+		The epoch up to which every chunk arrived is then returned instead,
+		stop if the whole guide arrived and start otherwise.
+		Pass the result of getChannels as channels to save fetching the
+		channel list again.
 		"""
 		country = country or config.plugins.plutotv.country.value
+		if self.useLegacyAPI(country):
+			return self._getBaseGuideLegacy(start, stop, country, callback)
 		headers = self._authHeaders(country)
 
-		channels = self.getChannels(country)
 		if not channels:
-			return []
+			channels = self._getChannelList(country, headers)
+		if not channels:
+			print(f"[PlutoTV] getBaseGuide: new API returned no channels for {country}, trying legacy API")
+			return self._getBaseGuideLegacy(start, stop, country, callback)
 
-		channel_ids = [ch['_id'] for ch in channels]
-		channel_lookup = {ch['_id']: ch for ch in channels}
+		channel_lookup = {ch.get('_id') or ch.get('id', ''): ch for ch in channels}
+		channel_ids = list(channel_lookup)
 
-		all_entries = []
 		group_size = 100
-		for i in range(0, len(channel_ids), group_size):
-			group = channel_ids[i:i + group_size]
-			params = {
-				'start': start,
-				'channelIds': ','.join(group),
-				'duration': '1440',
-			}
-			try:
-				response = self.session.get(self.TIMELINES_URL, params=params, headers=headers, timeout=10)
-				response.raise_for_status()
-				data = response.json().get("data", [])
-				for entry in data:
-					ch_id = entry.get('channelId', '')
-					ch_data = channel_lookup.get(ch_id, {})
-					all_entries.append({
-						'_id': ch_id,
-						'number': ch_data.get('number', 0),
-						'name': ch_data.get('name', ''),
-						'timelines': entry.get('timelines', []),
-					})
-			except Exception as e:
-				print(f"[PlutoTV] getBaseGuide new API error for {country}: {e}")
-
-		if not all_entries:
+		groups = [channel_ids[i:i + group_size] for i in range(0, len(channel_ids), group_size)]
+		results = [[] for group in groups]
+		emitters = [callback or result.append for result in results]
+
+		def fetchChunks(indexes):
+			workers = min(self.fetchConcurrency(), len(indexes))
+			if workers > 1:
+				with ThreadPoolExecutor(max_workers=workers) as executor:
+					return list(executor.map(lambda index: self._getTimelineChunk(index, groups[index], start, duration, headers, country, emitters[index], channel_lookup), indexes))
+			return [self._getTimelineChunk(index, groups[index], start, duration, headers, country, emitters[index], channel_lookup) for index in indexes]
+
+		chunks = fetchChunks(range(len(groups)))
+		for attempt in range(self.CHUNK_RETRIES):
+			if not (failed := [index for index, __, __, ok in chunks if not ok]) or len(failed) == len(groups):
+				break  # nothing to recover, or the API is down and the legacy API is tried below
+			time.sleep(self.session.backoff(attempt))
+			print("[PlutoTV] getBaseGuide %s: retrying chunks %s" % (country, ", ".join(str(index + 1) for index in failed)))
+			for index in failed:
+				results[index].clear()  # drop entries of a chunk that failed half way, a callback is given them again
+			for chunk in fetchChunks(failed):
+				chunks[chunk[0]] = chunk
+		print("[PlutoTV] getBaseGuide %s: %d chunks, latency %s" % (country, len(chunks), ", ".join("%.2fs" % seconds if ok else "failed" for __, __, seconds, ok in chunks)))
+
+		if not sum(count for __, count, __, __ in chunks):
 			print(f"[PlutoTV] getBaseGuide: new API returned no data for {country}, trying legacy API")
-			return self._getBaseGuideLegacy(start, stop, country)
+			return self._getBaseGuideLegacy(start, stop, country, callback)
 
-		return all_entries
+		if callback:
+			return isoTimestamp(stop if all(ok for __, __, __, ok in chunks) else start)
+		return [entry for result in results for entry in result]  # chunk order is channel order
 
-	def _getBaseGuideLegacy(self, start, stop, country):
-		"""Fetch guide data via the legacy api.pluto.tv/v2/channels endpoint."""
+	def _getBaseGuideLegacy(self, start, stop, country, callback=None):
+		"""Fetch guide data via the legacy api.pluto.tv/v2/channels endpoint.
+
+		The response can be many MB, so it is parsed one channel at a time
+		while it downloads. With callback, returns stop if the whole guide
+		arrived and start otherwise, as epoch.
+		"""
 		params = {'start': start, 'stop': stop, 'sid': self._sid, 'deviceId': self._deviceId}
 		headers = self._legacyHeaders(country)
+		guide = []
+		emit = callback or guide.append
+		count = 0
+		complete = False
 		try:
-			response = requests.get(self.LEGACY_GUIDE_URL, params=params, headers=headers, timeout=10)
-			response.raise_for_status()
-			guide = response.json()
-			if isinstance(guide, list):
-				print(f"[PlutoTV] getBaseGuide legacy API returned {len(guide)} entries for {country}")
-				return guide
-			print(f"[PlutoTV] getBaseGuide legacy API unexpected response for {country}")
-			return []
+			with self.session.get(self.LEGACY_GUIDE_URL, params=params, headers=headers, timeout=10, stream=True) as response:
+				response.raise_for_status()
+				for entry in iterJSONArray(response.iter_content(JSON_CHUNK_SIZE)):
+					emit(entry)
+					count += 1
+			print(f"[PlutoTV] getBaseGuide legacy API returned {count} entries for {country}")
+			complete = count > 0
 		except Exception as e:
 			print(f"[PlutoTV] getBaseGuide legacy API error for {country}: {e}")
-			return []
+		if callback:
+			return isoTimestamp(stop if complete else start)
+		return guide
 
 	def playServiceExtension(self, nav, sref, *args, **kwargs):
 		return self.recordServiceExtension(nav, sref), False
 
 	def recordServiceExtension(self, nav, sref, *args, **kwargs):
+		begin = time.perf_counter()
 		parts = sref.toString().split(":")
 		if len(parts) > 10 and parts[10].lower().startswith(self.PLUTO_SCHEMA):
-			_id = parts[10][len(self.PLUTO_SCHEMA):]
-			cc = {v: k for k, v in TSIDS.items()}.get(parts[4], None)
-			parts[10] = self.buildStreamURL(_id, cc).replace(":", "%3a")
+			prefix, suffix = self.streamTemplate(TSID_COUNTRIES.get(parts[4]) or config.plugins.plutotv.country.value, escaped=True)
+			parts[10] = prefix + parts[10][len(self.PLUTO_SCHEMA):] + suffix
 			sref = eServiceReference(":".join(parts))
+			self.zapTimes.append(time.perf_counter() - begin)
 		return sref
 
+	def zapStats(self):
+		"""p50/p99 in ms of the last service extension calls for Pluto services."""
+		if not (samples := sorted(self.zapTimes)):
+			return {}
+		return {"count": len(samples), "p50": samples[len(samples) // 2] * 1000, "p99": samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000}
+
 
 plutoRequest = PlutoRequest()
 
@@ -462,11 +1424,20 @@ plutoRequest = PlutoRequest()
 COUNTRY_NAMES = {cc: country[0].split("(")[0].strip() for country in sorted(ISO3166) if (cc := country[1].lower()) in PlutoRequest.X_FORWARDS}  # ISO3166 is sorted in English, sorted will sort by locale.
 
 TSIDS = {cc: "%X" % i for i, cc in enumerate(COUNTRY_NAMES, 1)}
+TSID_COUNTRIES = {tsid: cc for cc, tsid in TSIDS.items()}
 
 
 config.plugins.plutotv = ConfigSubsection()
 config.plugins.plutotv.country = ConfigSelection(default="local", choices=[("local", _("Local"))] + list(COUNTRY_NAMES.items()))
 config.plugins.plutotv.picons = ConfigSelection(default="snp", choices=[("snp", _("service name")), ("srp", _("service reference")), ("", _("None"))])
+config.plugins.plutotv.fetch_concurrency = ConfigSelection(default="4", choices=[("1", _("Off")), ("2", "2"), ("4", "4"), ("8", "8")])
+config.plugins.plutotv.incremental_epg = ConfigYesNo(default=True)
+config.plugins.plutotv.http_engine = ConfigSelection(default="requests", choices=[("requests", _("Threads")), ("twisted", _("Twisted"))])
+config.plugins.plutotv.country_concurrency = ConfigSelection(default="2", choices=[("1", _("Off")), ("2", "2"), ("3", "3")])
+config.plugins.plutotv.epg_hours = ConfigSelection(default="24", choices=[("24", _("1 day")), ("48", _("2 days")), ("72", _("3 days"))])
+config.plugins.plutotv.profiling = ConfigSelection(default="off", choices=[("off", _("Off")), ("cpu", _("CPU")), ("memory", _("CPU and memory"))])
+config.plugins.plutotv.epg_batch = ConfigSelection(default="200", choices=[("1", _("Off")), ("50", "50"), ("200", "200"), ("1000", "1000")])
+config.plugins.plutotv.picon_workers = ConfigSelection(default="16", choices=[("4", "4"), ("8", "8"), ("16", "16"), ("32", "32")])
 
 
 def getselectedcountries(skip=0):
@@ -486,66 +1457,313 @@ for n in range(1, NUMBER_OF_LIVETV_BOUQUETS + 1):
 	getattr(config.plugins.plutotv, "live_tv_country" + str(n)).addNotifier(autocountry, initial_call=n == NUMBER_OF_LIVETV_BOUQUETS)
 
 
+def loadGuideCoverage():
+	"""Per country guide horizon and lineup of the last imported guide."""
+	try:
+		with open(plutoRequest.stateFile(EPG_COVERAGE_FILE), "r") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def saveGuideCoverage(cc, coverage):
+	coverages = loadGuideCoverage()
+	coverages[cc] = coverage
+	try:
+		with open(plutoRequest.stateFile(EPG_COVERAGE_FILE), "w") as f:
+			json.dump(coverages, f)
+	except OSError as e:
+		print(f"[PlutoDownload] error saving guide coverage: {e}")
+
+
 class PiconFetcher:
+	"""Download picons with a fixed number of workers fed from a queue.
+
+	At most HOST_CONNECTIONS downloads run at the same time per image host.
+	All workers share the connection pool of httpClient.
+
+	Logos are stored once by the MD5 of their content in the store folder
+	of pluginPiconDir and the picons are symlinks into it, so a logo used
+	by channels of several bouquets is downloaded and kept only once per
+	URL. The ETag, Last-Modified, hash and time of the last check of each
+	logo URL are kept in META_FILE. Logos due for a check are revalidated
+	with a conditional request. Logos no picon links to are deleted after
+	each update.
+	"""
+	HOST_CONNECTIONS = PICON_HOST_CONNECTIONS
+	WORKERS = 16  # when the setting is not available
+	META_FILE = "picons.json"
+	MAX_AGE = 7 * 24 * 60 * 60  # seconds before a logo is checked for changes
+
 	def __init__(self, parent=None):
 		self.parent = parent
 		self.piconDir = self.getPiconPath()
 		self.pluginPiconDir = os.path.join(self.piconDir, "PlutoTV")
+		self.storeDir = os.path.join(self.pluginPiconDir, "store")
+		self.defaultIcon = os.path.join(self.pluginPiconDir, PLUGIN_ICON)
 		piconWidth = 220
 		piconHeight = 132
 		self.resolutionStr = f"?h={piconHeight}&w={piconWidth}"
-		self.piconList = []
+		self.piconList = {}  # logo URL: picon file names
+		self.lock = threading.Lock()
+		self.hostSlots = {}
+		self.counter = self.fetched = self.unchanged = self.failed = self.bytes = 0
+		self.seconds = 0.0
+		self.meta = None
+		self.legacyMeta = {}
 
 	def createFolders(self):
 		os.makedirs(self.piconDir, exist_ok=True)
-		os.makedirs(self.pluginPiconDir, exist_ok=True)
-		self.defaultIcon = os.path.join(self.pluginPiconDir, PLUGIN_ICON)
+		os.makedirs(self.storeDir, exist_ok=True)
 		shutil.copy(os.path.join(PLUGIN_FOLDER, PLUGIN_ICON), self.defaultIcon)
 
 	def addPicon(self, ref, name, url, silent):
 		if not config.plugins.plutotv.picons.value:
 			return
 		piconname = os.path.join(self.piconDir, ch_name + ".png") if config.plugins.plutotv.picons.value == "snp" and (ch_name := sanitizeFilename(name.lower())) else os.path.join(self.piconDir, ref.replace(":", "_") + ".png")
-		one_week_ago = time.time() - 60 * 60 * 24 * 7
-		if not (fileExists(piconname) and (silent or os.path.getmtime(piconname) > one_week_ago)):
-			self.piconList.append((url, piconname))
+		if os.path.isfile(piconname) and not os.path.islink(piconname):
+			return  # not ours, see makesoftlink
+		self.metadata()
+		self.adopt(piconname)
+		if url in self.piconList:  # the same logo in another bouquet
+			self.piconList[url].append(piconname)
+		elif (meta := self.meta.get(url)) and (silent or meta["checked"] > time.time() - self.MAX_AGE) and os.path.isfile(self.blobPath(meta["hash"])):
+			self.linkPicon(url, piconname)  # in the store and recently checked
+		else:
+			self.piconList[url] = [piconname]
+
+	def blobPath(self, digest):
+		return os.path.join(self.storeDir, digest + ".png")
+
+	def metadata(self):
+		"""The cache validators and hash of each logo URL."""
+		if self.meta is None:
+			try:
+				with open(os.path.join(self.pluginPiconDir, self.META_FILE), "r") as f:
+					meta = json.load(f)
+			except (OSError, ValueError):
+				meta = {}
+			self.meta = meta.get("urls", {})
+			self.legacyMeta = {} if "urls" in meta else meta  # picon file name: entry, before the store
+		return self.meta
+
+	def adopt(self, piconname):
+		"""Move a logo stored under the picon name by an earlier version into the store."""
+		legacy = self.piconFilepath(piconname)
+		if not os.path.isfile(legacy) or legacy == self.defaultIcon:
+			return
+		entry = self.legacyMeta.pop(os.path.basename(legacy), {})
+		if not (digest := self.fileHash(legacy)):
+			return
+		try:
+			os.makedirs(self.storeDir, exist_ok=True)
+			os.replace(legacy, self.blobPath(digest))
+		except OSError as e:
+			print(f"[Fetcher] error moving {legacy} to the picon store: {e}")
+			return
+		self.makesoftlink(self.blobPath(digest), piconname)
+		if url := entry.get("url"):
+			self.meta.setdefault(url, {"etag": entry.get("etag"), "lastModified": entry.get("lastModified"), "hash": digest, "checked": entry.get("checked", 0)})
+		# without metadata the URL is unknown, the logo is downloaded again but not rewritten
+
+	def saveMetadata(self):
+		with self.lock:
+			urls = {url: entry for url, entry in self.metadata().items() if os.path.isfile(self.blobPath(entry["hash"]))}  # drop logos that are gone
+		filename = os.path.join(self.pluginPiconDir, self.META_FILE)
+		try:
+			with open(filename + ".tmp", "w") as f:
+				json.dump({"urls": urls}, f)
+			os.replace(filename + ".tmp", filename)
+		except OSError as e:
+			print(f"[Fetcher] error saving picon metadata: {e}")
+
+	def collectGarbage(self):
+		"""Delete the logos in the store that no picon links to and save the metadata."""
+		if self.meta is None or not os.path.isdir(self.storeDir):
+			return  # no picons this run
+		prefix = self.storeDir + os.sep
+		linked = set()
+		removed = 0
+		try:
+			for entry in os.scandir(self.piconDir):
+				if entry.is_symlink() and (target := os.readlink(entry.path)).startswith(prefix):
+					linked.add(target[len(prefix):])
+			for entry in os.scandir(self.storeDir):
+				if entry.name not in linked:
+					os.remove(entry.path)
+					removed += 1
+		except OSError as e:
+			print(f"[Fetcher] error cleaning up the picon store: {e}")
+		self.saveMetadata()
+		if removed:
+			print(f"[Fetcher] removed {removed} unused logos from the picon store")
+
+	@classmethod
+	def workerCount(cls):
+		try:
+			return min(max(int(config.plugins.plutotv.picon_workers.value), 1), MAX_PICON_WORKERS)
+		except (AttributeError, ValueError):
+			return cls.WORKERS
 
 	def fetchPicons(self):
-		maxthreads = 100  # make configurable
-		self.counter = 0
-		failed = []
+		self.counter = self.fetched = self.unchanged = self.failed = self.bytes = 0
 		self.createFolders()
-		if self.piconList:
-			threads = [threading.Thread(target=self.downloadURL, args=(url, filename)) for url, filename in self.piconList]
-			for thread in threads:
-				while threading.activeCount() > maxthreads:
-					time.sleep(1)
+		if not self.piconList:
+			return
+		self.metadata()
+		begin = time.perf_counter()
+		if httpClient.useTwisted():
+			threads.blockingCallFromThread(reactor, self.fetchPiconsAsync)
+		else:
+			pending = queue.SimpleQueue()
+			for item in self.piconList.items():
+				pending.put(item)
+			workers = [threading.Thread(target=self.worker, args=(pending,), name="PiconFetcher", daemon=True) for __ in range(min(self.workerCount(), len(self.piconList)))]
+			started = []
+			for thread in workers:
+				pending.put(None)  # one stop marker per worker, after the picons
 				try:
 					thread.start()
-				except RuntimeError:
-					failed.append(thread)
-			for thread in threads:
-				if thread not in failed:
-					thread.join()
-			print("[Fetcher] all fetched")
-
-	def downloadURL(self, url, piconname):
-		filepath = os.path.join(self.pluginPiconDir, piconname.removeprefix(self.piconDir).removeprefix(os.sep))  # second removeprefix ensures no leading / is left on the filename as this would be recognised as an absolute path by os.path.join and the join would be skipped
-		self.counter += 1
-		try:
-			response = requests.get(f"{url}{self.resolutionStr}", timeout=2.50, headers={"User-Agent": USER_AGENT})
-			response.raise_for_status()
-			content_type = response.headers.get('content-type')
-			if content_type and content_type.lower() == 'image/png' and len(rc := response.content):
-				with open(filepath, "wb") as f:
-					f.write(rc)
+				except RuntimeError:  # no more threads available, the started workers take over the queue
+					break
+				started.append(thread)
+			if not started:
+				self.worker(pending)
+			for thread in started:
+				thread.join()
+		self.seconds = time.perf_counter() - begin
+		print("[Fetcher] all fetched: %(fetched)d logos, %(unchanged)d unchanged, %(failed)d failed, %(bytes)d bytes in %(seconds).1fs (%(rate).1f/s)" % self.stats())
+
+	def worker(self, pending):
+		while (item := pending.get()) is not None:
+			try:
+				self.downloadURL(*item)
+			except Exception as e:  # e.g. the flash is full, carry on with the other logos
+				print(f"[Fetcher] error fetching {item[0]}: {e}")
+				self.count(None)
+
+	def fetchPiconsAsync(self):
+		"""Download all picons as Deferreds on the reactor, with the same limits as the workers."""
+		semaphore = defer.DeferredSemaphore(self.workerCount())
+		return defer.DeferredList([semaphore.run(self.hostSlotAsync(url).run, self.downloadURLAsync, url, piconnames) for url, piconnames in self.piconList.items()])
+
+	def hostSlot(self, url):
+		host = urlsplit(url).netloc
+		with self.lock:
+			if (slot := self.hostSlots.get(host)) is None:
+				slot = self.hostSlots[host] = threading.BoundedSemaphore(self.HOST_CONNECTIONS)
+			return slot
+
+	def hostSlotAsync(self, url):
+		host = urlsplit(url).netloc
+		if (slot := self.hostSlots.get(host)) is None:  # reactor thread only
+			slot = self.hostSlots[host] = defer.DeferredSemaphore(self.HOST_CONNECTIONS)
+		return slot
+
+	def finish(self, url, piconnames, result):
+		"""Link the picons of a logo and count it. Returns the number of logos finished."""
+		try:
+			for piconname in piconnames:
+				self.linkPicon(url, piconname)
+		except OSError as e:
+			print(f"[Fetcher] error linking {url}: {e}")
+			result = None
+		return self.count(result)
+
+	def count(self, result):
+		"""Count one finished logo, result is the (outcome, bytes) of savePicon. Returns the number finished."""
+		outcome, size = result if isinstance(result, tuple) else ("failed", 0)
+		with self.lock:
+			self.counter += 1
+			setattr(self, outcome, getattr(self, outcome) + 1)
+			self.bytes += size
+			return self.counter
+
+	def stats(self):
+		with self.lock:
+			return {"fetched": self.fetched, "unchanged": self.unchanged, "failed": self.failed, "bytes": self.bytes, "seconds": self.seconds, "rate": self.counter / self.seconds if self.seconds else 0.0}
+
+	def piconFilepath(self, piconname):
+		return os.path.join(self.pluginPiconDir, piconname.removeprefix(self.piconDir).removeprefix(os.sep))  # second removeprefix ensures no leading / is left on the filename as this would be recognised as an absolute path by os.path.join and the join would be skipped
+
+	def conditionalHeaders(self, url):
+		headers = {"User-Agent": USER_AGENT}
+		with self.lock:
+			meta = self.metadata().get(url)
+		if meta and os.path.isfile(self.blobPath(meta["hash"])):
+			if meta.get("etag"):
+				headers["If-None-Match"] = meta["etag"]
+			if meta.get("lastModified"):
+				headers["If-Modified-Since"] = meta["lastModified"]
+		return headers
+
+	def downloadURL(self, url, piconnames):
+		result = None
+		try:
+			with self.hostSlot(url):
+				response = httpClient.get(f"{url}{self.resolutionStr}", timeout=2.50, headers=self.conditionalHeaders(url), retries=1)
+			result = self.savePicon(response, url)
 		except requests.exceptions.RequestException:
 			pass
-		if not fileExists(filepath):  # it seems nothing was downloaded
+		counter = self.finish(url, piconnames, result)
+		if self.parent:
+			threads.deferToThread(self.parent.updateProgressBar, counter)
+
+	def downloadURLAsync(self, url, piconnames):
+		def failed(failure):
+			if not failure.check(requests.exceptions.RequestException):
+				print(f"[Fetcher] error fetching {url}: {failure.getErrorMessage()}")
+
+		def done(result):
+			counter = self.finish(url, piconnames, result)
+			if self.parent:
+				self.parent.updateProgressBar(counter)
+		d = httpClient.getAsync(f"{url}{self.resolutionStr}", timeout=2.50, headers=self.conditionalHeaders(url), retries=1)
+		d.addCallback(self.savePicon, url)
+		d.addErrback(failed)
+		d.addCallback(done)
+		return d
+
+	def savePicon(self, response, url):
+		"""Add the logo in response to the store unless it is there already.
+
+		Returns ("fetched" | "unchanged" | "failed", bytes received).
+		"""
+		response.raise_for_status()
+		if response.status_code == 304:
+			with self.lock:
+				if meta := self.metadata().get(url):
+					meta["checked"] = int(time.time())
+			return "unchanged", 0
+		content_type = response.headers.get('content-type')
+		if not (content_type and content_type.lower() == 'image/png' and len(rc := response.content)):
+			return "failed", 0
+		digest = hashlib.md5(rc).hexdigest()
+		with self.lock:
+			self.meta[url] = {"etag": response.headers.get("ETag"), "lastModified": response.headers.get("Last-Modified"), "hash": digest, "checked": int(time.time())}
+		if os.path.isfile(filepath := self.blobPath(digest)):
+			return "unchanged", len(rc)
+		with open(filepath + ".%x.tmp" % threading.get_ident(), "wb") as f:  # the same logo can come from several URLs at once
+			f.write(rc)
+		os.replace(f.name, filepath)
+		return "fetched", len(rc)
+
+	@staticmethod
+	def fileHash(filepath):
+		try:
+			with open(filepath, "rb") as f:
+				return hashlib.md5(f.read()).hexdigest()
+		except OSError:
+			return None
+
+	def linkPicon(self, url, piconname):
+		with self.lock:
+			meta = self.metadata().get(url)
+		if not (meta and os.path.isfile(filepath := self.blobPath(meta["hash"]))):  # it seems nothing was downloaded
+			if fileExists(piconname):
+				return  # keep the previous logo
 			filepath = self.defaultIcon
 		self.makesoftlink(filepath, piconname)
-		if self.parent:
-			threads.deferToThread(self.parent.updateProgressBar, self.counter)
 
 	def makesoftlink(self, filepath, softlinkpath):
 		svgpath = softlinkpath.removesuffix(".png") + ".svg"
@@ -586,6 +1804,211 @@ class PiconFetcher:
 		return lastPiconPath or "/picon"
 
 
+class GuideEvents:
+	"""The guide of one channel, kept in columns until it is imported.
+
+	Iterating yields (title, summary, start, duration, genre) tuples.
+	Texts are kept in one list and numbers in one array instead of a tuple
+	and int objects per event. With a strings table, titles and summaries
+	that repeat are stored once (see PlutoDownloadBase.fetchCountry).
+	"""
+	__slots__ = ("texts", "numbers")
+	lock = threading.Lock()  # guide windows of a channel are added from several threads
+
+	def __init__(self):
+		self.texts = []  # title, summary, title, summary, ...
+		self.numbers = array("q")  # start, duration, genre, start, ...
+
+	def __len__(self):
+		return len(self.numbers) // 3
+
+	def __iter__(self):
+		texts, numbers = self.texts, self.numbers
+		return zip(texts[::2], texts[1::2], numbers[::3], numbers[1::3], numbers[2::3])
+
+	def append(self, title, summary, start, duration, genre, strings=None):
+		if strings is not None:
+			title = strings.setdefault(title, title)
+			summary = strings.setdefault(summary, summary)
+		self.texts.append(title)
+		self.texts.append(summary)
+		self.numbers.append(start)
+		self.numbers.append(duration)
+		self.numbers.append(genre)
+
+	def extend(self, other):
+		self.texts += other.texts
+		self.numbers += other.numbers
+
+	@classmethod
+	def add(cls, guideList, _id, events):
+		with cls.lock:
+			if (known := guideList.get(_id)) is None:
+				guideList[_id] = events
+			else:
+				known.extend(events)
+
+
+class EPGFingerprints:
+	"""What was last imported into the EPG cache, per service reference.
+
+	Each service maps event start to a CRC of the event, which is enough
+	to tell whether a newly downloaded schedule brings anything new.
+	"""
+	KEEP = 12 * 60 * 60  # forget events that started longer ago than this
+
+	def __init__(self, filename=None):
+		self.filename = filename or plutoRequest.stateFile(EPG_FINGERPRINT_FILE)
+		self.services = {}
+		try:
+			with open(self.filename, "rb") as f:
+				self.services = pickle.load(f)
+		except Exception:
+			pass
+
+	@staticmethod
+	def fingerprint(events):
+		return {event[0]: zlib.crc32(repr(event).encode()) for event in events}
+
+	def unchanged(self, ref, fingerprint):
+		"""True when every event was imported before exactly like this."""
+		known = self.services.get(ref)
+		return known is not None and all(known.get(start) == crc for start, crc in fingerprint.items())
+
+	def update(self, ref, fingerprint):
+		oldest = time.time() - self.KEEP
+		known = {start: crc for start, crc in self.services.get(ref, {}).items() if start >= oldest}
+		known.update(fingerprint)
+		self.services[ref] = known
+
+	def save(self):
+		oldest = time.time() - self.KEEP
+		self.services = {ref: known for ref, known in self.services.items() if known and max(known) >= oldest}  # drop channels that are gone
+		try:
+			with open(self.filename + ".tmp", "wb") as f:
+				pickle.dump(self.services, f, protocol=5)
+			os.replace(self.filename + ".tmp", self.filename)
+		except OSError as e:
+			print(f"[PlutoDownload] error saving EPG fingerprints: {e}")
+
+
+class EPGImporter:
+	"""Collect the events of many services and import them into the EPG cache in batches.
+
+	importEvents applies one event list to all references it is given, so
+	services with the same schedule are imported in one call. Batches are
+	imported by a background worker while the next channels are processed.
+	With fingerprints, services whose events are all in the EPG cache as
+	they were last imported are skipped.
+	"""
+
+	def __init__(self, epgcache, batchSize=None, fingerprints=None):
+		self.epgcache = epgcache
+		self.fingerprints = fingerprints
+		self.batchSize = self.configuredBatchSize() if batchSize is None else max(batchSize, 1)
+		self.pending = []
+		self.worker = ThreadPoolExecutor(max_workers=1) if self.batchSize > 1 else None
+		self.jobs = []
+		self.services = set()  # a service is added once per guide window
+		self.events = 0
+		self.calls = 0
+		self.skipped = 0
+		self.seconds = 0.0
+
+	@staticmethod
+	def configuredBatchSize():
+		try:
+			return max(int(config.plugins.plutotv.epg_batch.value), 1)
+		except (AttributeError, ValueError):
+			return 1
+
+	def add(self, ref, events):
+		if events:
+			fingerprint = None
+			if self.fingerprints:
+				fingerprint = self.fingerprints.fingerprint(events)
+				if self.fingerprints.unchanged(ref, fingerprint) and self.inCache(ref, events):
+					self.skipped += 1
+					return
+			self.pending.append((ref, events, fingerprint))
+			if len(self.pending) >= self.batchSize:
+				self.flush()
+
+	def inCache(self, ref, events):
+		"""Check the EPG cache still has the service, it may have been cleared since the last import."""
+		now = int(time.time())
+		when = next((begin for begin, duration, *__ in events if begin + duration > now), events[-1][0])
+		try:
+			return self.epgcache.lookupEventTime(eServiceReference(ref), max(when, now)) is not None
+		except Exception:
+			return False
+
+	def flush(self):
+		batch, self.pending = self.pending, []
+		if batch:
+			if self.worker:
+				self.jobs = [job for job in self.jobs if not job.done()]
+				self.jobs.append(self.worker.submit(self.importBatch, batch))
+			else:
+				self.importBatch(batch)
+
+	def importBatch(self, batch):
+		begin = time.perf_counter()
+		schedules = {}
+		for ref, events, fingerprint in batch:
+			schedules.setdefault(events, []).append((ref, fingerprint))
+		for events, services in schedules.items():
+			refs = [ref for ref, __ in services]
+			try:
+				self.epgcache.importEvents(refs if len(refs) > 1 else refs[0], events)
+			except Exception as e:
+				print("[PlutoDownload] EPG import error:", e)
+				continue
+			if self.fingerprints:
+				for ref, fingerprint in services:
+					self.fingerprints.update(ref, fingerprint)
+			self.calls += 1
+			self.services.update(refs)
+			self.events += len(events) * len(refs)
+		self.seconds += time.perf_counter() - begin
+
+	def close(self):
+		"""Import what is left and wait for the worker. Returns stats()."""
+		self.flush()
+		if self.worker:
+			for job in self.jobs:
+				job.result()
+			self.worker.shutdown()
+			self.worker = None
+		self.jobs = []
+		return self.stats()
+
+	def stats(self):
+		return {"services": len(self.services), "events": self.events, "calls": self.calls, "skipped": self.skipped, "seconds": self.seconds, "rate": self.events / self.seconds if self.seconds else 0.0}
+
+
+class GuideWindows:
+	"""The time windows of the guide of one country, fetched one after another.
+
+	Each window is fetched while the previous one is imported, so at most
+	two windows of the guide are held. covered is the end of the guide that
+	arrived without gaps so far.
+	"""
+
+	def __init__(self, cc, channels, start, stop, since=0, lineup="", coverage=None):
+		self.cc = cc
+		self.channels = channels
+		self.since = since
+		self.lineup = lineup
+		self.start = self.covered = start
+		self.windows = [(begin, min(begin + PlutoRequest.GUIDE_WINDOW * 60, stop)) for begin in range(start, stop, PlutoRequest.GUIDE_WINDOW * 60)] if stop - start >= 3600 else []
+		self.previous = coverage or {}
+
+	def coverage(self):
+		"""The coverage to store for the country, the previous one if no guide arrived."""
+		return {"horizon": self.covered, "lineup": self.lineup} if self.covered > self.start else self.previous
+
+
 class PlutoDownloadBase():
 	downloadActive = False  # shared between instances
 
@@ -593,6 +2016,9 @@ class PlutoDownloadBase():
 		self.channelsList = {}
 		self.guideList = {}
 		self.categories = []
+		self.guide = None
+		self.nextWindow = None  # future of the guide window being fetched
+		self.windowFetcher = None
 		self.state = 1  # this is a hack
 		self.silent = silent
 		PlutoDownloadBase.downloadActive = False
@@ -606,34 +2032,59 @@ class PlutoDownloadBase():
 		for cc in countries:
 			yield cc
 
+	@profiled("download")
 	def download(self):
 		if PlutoDownloadBase.downloadActive:
 			if not self.silent:
 				self.session.openWithCallback(self.close, MessageBox, _("A silent download is in progress."), MessageBox.TYPE_INFO, timeout=30)
 			print("[PlutoDownload] A silent download is in progress.")
 			return
-		self.ccGenerator = self.cc()
+		pipelineStats.begin(self.silent)
+		self.ccList = list(self.cc())
+		self.ccIndex = 0
+		self.prefetched = {}
+		workers = self.countryConcurrency()
+		self.prefetcher = ThreadPoolExecutor(max_workers=workers) if workers > 1 and len(self.ccList) > 1 else None
 		self.piconFetcher = PiconFetcher(self)
-		self.manager()
+		self.epgFingerprints = EPGFingerprints()
+		with httpClient.reactorBlocked():  # the timer of the automatic update calls this on the reactor thread
+			self.manager()
+
+	@staticmethod
+	def countryConcurrency():
+		try:
+			return max(int(config.plugins.plutotv.country_concurrency.value), 1)
+		except (AttributeError, ValueError):
+			return 1
 
 	def manager(self):
 		PlutoDownloadBase.downloadActive = True
-		if cc := next(self.ccGenerator, None):
+		if self.ccIndex < len(self.ccList):
+			cc = self.ccList[self.ccIndex]
+			self.ccIndex += 1
+			self.prefetch()
 			self.downloadBouquet(cc)
 		else:
 			self.channelsList.clear()
 			self.guideList.clear()
 			self.categories.clear()
 			PlutoDownloadBase.downloadActive = False
-			self.ccGenerator = None
+			self.ccList = []
+			self.shutdownPrefetcher()
 			if self.piconFetcher.piconList:
 				self.total = len(self.piconFetcher.piconList)
 				threads.deferToThread(self.updateProgressBar, 0)  # reset
 				threads.deferToThread(self.updateAction, _("picons"))  # GUI widget
 				threads.deferToThread(self.updateStatus, _("Fetching picons..."))  # GUI widget
 				self.piconFetcher.fetchPicons()
+				stats = self.piconFetcher.stats()
+				pipelineStats.add(None, "picons", stats["seconds"], picons=self.total, fetched=stats["fetched"], unchanged=stats["unchanged"], failed=stats["failed"], bytes=stats["bytes"])
+				print("[PlutoDownload] HTTP connections: %(requests)d requests, %(connections)d connections, %(reused)d reused, %(retries)d retries, open circuits: %(open)s" % httpClient.stats())
 				threads.deferToThread(self.updateProgressBar, self.total)  # reset
+			self.piconFetcher.collectGarbage()
 			self.piconFetcher = None
+			pipelineStats.end()
+			print("[PlutoDownload] request cache: %(hits)d hits, %(misses)d misses, %(coalesced)d coalesced, %(revalidated)d revalidated, %(evictions)d evicted, %(entries)d entries, %(bytes)d bytes" % plutoRequest.stats())
 			threads.deferToThread(self.updateStatus, _("LiveTV update completed"))  # GUI widget
 			time.sleep(3)
 			self.exitOk()
@@ -650,10 +2101,12 @@ class PlutoDownloadBase():
 		threads.deferToThread(self.updateAction, cc)  # GUI widget
 		threads.deferToThread(self.updateProgressBar, 0)  # reset
 		threads.deferToThread(self.updateStatus, _("Processing data..."))  # GUI widget
-		channels = sorted(plutoRequest.getChannels(cc), key=lambda x: x["number"])
-		guide = self.getGuidedata(cc)
-		[self.buildM3U(channel) for channel in channels]
+		channels, self.guideList, self.guide = self.getCountryData(cc)
+		self.fetchNextWindow()
+		with pipelineStats.stage(cc, "m3u", channels=len(channels)):
+			[self.buildM3U(channel) for channel in channels]
 		self.total = len(channels)
+		self.epgImporter = EPGImporter(self.epgcache, fingerprints=self.epgFingerprints)
 
 		if len(self.categories) == 0:
 			self.noCategories()
@@ -664,10 +2117,104 @@ class PlutoDownloadBase():
 				self.subtotal = 0
 			self.key = 0
 			self.chitem = 0
-			[self.buildGuide(event) for event in guide]
 			for i in range(self.total + 1):
 				self.updateprogress(param=i)
 
+	def prefetch(self):
+		"""Start the network fetch for upcoming countries.
+
+		The country about to be processed and up to the concurrency limit of
+		following countries are submitted to the prefetcher, so the download
+		of country N+1 overlaps parsing and EPG import of country N. Bouquets
+		are still written one after another in the selected order.
+		"""
+		if self.prefetcher:
+			for cc in self.ccList[self.ccIndex - 1:self.ccIndex - 1 + self.countryConcurrency()]:
+				if cc not in self.prefetched:
+					self.prefetched[cc] = self.prefetcher.submit(self.fetchCountry, cc)
+
+	def shutdownPrefetcher(self):
+		if self.prefetcher:
+			self.prefetcher.shutdown(wait=False, cancel_futures=True)
+			self.prefetcher = None
+		self.prefetched = {}
+		if self.windowFetcher:
+			self.windowFetcher.shutdown(wait=False, cancel_futures=True)
+			self.windowFetcher = None
+		self.nextWindow = None
+
+	def getCountryData(self, cc):
+		if future := self.prefetched.pop(cc, None):
+			try:
+				return future.result()
+			except Exception as e:
+				print(f"[PlutoDownload] prefetch error for {cc}: {e}")
+		return self.fetchCountry(cc)
+
+	def fetchCountry(self, cc):
+		"""Network stage of a bouquet update.
+
+		Returns (channels, guideList, guide). Only the first time window of
+		the guide is fetched and parsed into guideList here, so memory does
+		not grow with the guide length. The other windows of guide are
+		fetched one at a time, each while the one before is imported.
+		Events ending before the horizon of an incremental update are
+		skipped.
+		"""
+		channels = sorted(plutoRequest.getChannels(cc), key=lambda x: x["number"])
+		lineup = hashlib.md5(",".join(sorted(channel["_id"] for channel in channels)).encode()).hexdigest()
+		since = 0
+		coverage = loadGuideCoverage().get(cc, {})
+		if self.silent and config.plugins.plutotv.incremental_epg.value:
+			if coverage.get("lineup") == lineup and coverage.get("horizon", 0) > time.time() + 3600:
+				since = coverage["horizon"]
+		guide = GuideWindows(cc, channels, *self.guideWindow(since, self.guideHours()), since, lineup, coverage)
+		guideList = self.fetchGuideWindow(guide, guide.windows.pop(0)) if guide.windows else {}
+		if since:
+			print(f"[PlutoDownload] incremental guide for {cc} from {time.strftime('%Y-%m-%d %H:%M', time.gmtime(guide.start))} UTC")
+		return channels, guideList, guide
+
+	def fetchNextWindow(self):
+		"""Start fetching the next window of the guide in the background."""
+		self.nextWindow = None
+		if self.guide and self.guide.windows:
+			if self.windowFetcher is None:
+				self.windowFetcher = ThreadPoolExecutor(max_workers=1)
+			self.nextWindow = self.windowFetcher.submit(self.fetchGuideWindow, self.guide, self.guide.windows.pop(0))
+
+	def fetchGuideWindow(self, guide, window):
+		"""Fetch and parse the time window (start, stop) of guide. Returns its guideList.
+
+		Windows must be fetched in order. The coverage of guide only moves
+		up to where the guide arrived, and not past a window that is
+		incomplete.
+		"""
+		start, stop = window
+		guideList = {}
+		strings = {}  # repeated titles and summaries of the window, dropped once it is parsed
+
+		def parse(event):
+			begin = time.perf_counter()
+			self.buildGuide(event, guideList, guide.since, strings)
+			pipelineStats.add(guide.cc, "parse", time.perf_counter() - begin, items=len(event.get("timelines", ())))
+
+		with pipelineStats.stage(guide.cc, "guide"):
+			covered = self.getGuidedata(guide.cc, start, stop, parse, guide.channels)
+		if covered < stop:
+			print(f"[PlutoDownload] guide for {guide.cc} incomplete, {(covered - start) // 3600} of {(stop - start) // 3600} hours from {time.strftime('%Y-%m-%d %H:%M', time.gmtime(start))} UTC arrived")
+		if guide.covered == start:
+			guide.covered = covered
+		return guideList
+
+	def serviceRef(self, sid):
+		return "4097:0:1:%s:%s:FF:CCCC0000:0:0:0" % (sid, self.tsid)
+
+	def importGuide(self, ref, _id):
+		# (title, summary, start, duration, genre) -> (begin, duration, title, short, summary, genre)
+		# events of adjacent guide windows overlap and arrive in any order
+		events = {evt[2]: (evt[2], evt[3], evt[0], "", evt[1], evt[4]) for evt in self.guideList.pop(_id, ())}  # free the guide as it is imported
+		self.epgImporter.add(ref + ":https%3a//.m3u8", tuple(events[begin] for begin in sorted(events)))
+
 	def updateprogress(self, param):
 		if hasattr(self, "state") and self.state == 1:  # hack for exit before end
 			threads.deferToThread(self.updateProgressBar, param)
@@ -685,43 +2232,44 @@ class PlutoDownloadBase():
 				if self.chitem == 0:
 					self.bouquet.append("1:64:%s:0:0:0:0:0:0:0::%s" % (self.key, self.categories[self.key]))
 
-				ch_sid, ch_hash, ch_name, ch_logourl, _id = self.channelsList[key][self.chitem]
+				ch_sid, ch_hash, ch_name, ch_logourl = self.channelsList[key][self.chitem]
 
-				self.bouquet.append("4097:0:1:%s:%s:FF:CCCC0000:0:0:0:%s:%s" % (ch_sid, self.tsid, plutoRequest.PLUTO_SCHEMA + _id, ch_name))
+				self.bouquet.append("4097:0:1:%s:%s:FF:CCCC0000:0:0:0:%s:%s" % (ch_sid, self.tsid, plutoRequest.PLUTO_SCHEMA + ch_hash, ch_name))
 				self.chitem += 1
 
-				ref = "4097:0:1:%s:%s:FF:CCCC0000:0:0:0" % (ch_sid, self.tsid)
+				ref = self.serviceRef(ch_sid)
 				# print("[updateprogress] ref", ref)
 				threads.deferToThread(self.updateStatus, _("Waiting for Channel: ") + ch_name)  # GUI widget
-
-				chevents = []
-				if ch_hash in self.guideList:
-					for evt in self.guideList[ch_hash]:
-						title = evt[0]
-						summary = evt[1]
-						begin = int(round(evt[2]))
-						duration = evt[3]
-						genre = evt[4]
-
-						chevents.append((begin, duration, title, "", summary, genre))
-				if len(chevents) > 0:
-					iterator = iter(chevents)
-					events_tuple = tuple(iterator)
-					self.epgcache.importEvents(ref + ":https%3a//.m3u8", events_tuple)
-
+				self.importGuide(ref, ch_hash)
 				self.piconFetcher.addPicon(ref, ch_name, ch_logourl, self.silent)
 			else:
-				eDVBDB.getInstance().addOrUpdateBouquet(BOUQUET_NAME % COUNTRY_NAMES.get(self.bouquetCC, self.bouquetCC), BOUQUET_FILE % self.bouquetCC, self.bouquet, False)  # place at bottom if not exists
+				while self.nextWindow:  # the rest of the guide, one window at a time
+					self.epgImporter.flush()  # don't hold the events of the last window while the next one is parsed
+					threads.deferToThread(self.updateStatus, _("Fetching EPG..."))  # GUI widget
+					self.guideList = self.nextWindow.result()
+					self.fetchNextWindow()
+					for rows in self.channelsList.values():
+						for ch_sid, ch_hash, __, __ in rows:
+							self.importGuide(self.serviceRef(ch_sid), ch_hash)
+				with pipelineStats.stage(self.bouquetCC, "bouquet"):
+					eDVBDB.getInstance().addOrUpdateBouquet(BOUQUET_NAME % COUNTRY_NAMES.get(self.bouquetCC, self.bouquetCC), BOUQUET_FILE % self.bouquetCC, self.bouquet, False)  # place at bottom if not exists
 				os.makedirs(os.path.dirname(TIMER_FILE), exist_ok=True)  # create config folder recursive if not exists
 				open(TIMER_FILE, "w").write(str(time.time()))
+				stats = self.epgImporter.close()
+				pipelineStats.add(self.bouquetCC, "import", stats["seconds"], calls=stats["calls"], events=stats["events"], services=stats["services"], skipped=stats["skipped"])
+				print("[PlutoDownload] EPG import for %(cc)s: %(events)d events for %(services)d services in %(calls)d calls, %(skipped)d unchanged services skipped, %(seconds).2fs (%(rate).0f events/s)" % dict(stats, cc=self.bouquetCC))
+				self.epgFingerprints.save()
+				if self.guide:
+					saveGuideCoverage(self.bouquetCC, self.guide.coverage())
+					self.guide = None
 				self.manager()
 
-	def buildGuide(self, event):
+	def buildGuide(self, event, guideList, since=0, strings=None):
 		# (title, summary, start, duration, genre)
 		_id = event.get("_id", "")
 		if len(_id) == 0:
 			return
-		self.guideList[_id] = []
+		events = GuideEvents()
 		timelines = event.get("timelines", [])
 		chplot = (event.get("description", "") or event.get("summary", ""))
 
@@ -734,12 +2282,12 @@ class PlutoDownloadBase():
 
 			genre = self.convertgenre(epgenre)
 
-			offset = datetime.datetime.now() - datetime.datetime.utcnow()
 			try:
-				starttime = self.strpTime(item["start"]) + offset
+				start = isoTimestamp(item["start"])
 			except:
-				return
-			start = time.mktime(starttime.timetuple())
+				break
+			if start + epdur <= since:
+				continue  # already imported by the previous run
 			title = (item.get("title", ""))
 			tvplot = (series.get("description", "") or series.get("summary", "") or chplot)
 			epnumber = episode.get("number", 0)
@@ -757,10 +2305,12 @@ class PlutoDownloadBase():
 				epplot = "T%d Ep.%d %s" % (epseason, epnumber, epplot)
 
 			if epdur > 0:
-				self.guideList[_id].append((title, epplot, start, epdur, genre))
+				events.append(title, epplot, start, epdur, genre, strings)
+		if events:
+			GuideEvents.add(guideList, _id, events)  # called once per guide window
 
 	def buildM3U(self, channel):
-		# (number, _id, name, logo, url)
+		# (number, _id, name, logo)
 		logo = (channel.get("colorLogoPNG", {}).get("path", None) or None)
 		group = channel.get("category", "")
 		_id = channel["_id"]
@@ -777,10 +2327,11 @@ class PlutoDownloadBase():
 		else:
 			number = "%X" % channel["number"]
 
-		self.channelsList[group].append((str(number), _id, channel["name"], logo, _id))
+		self.channelsList[group].append((str(number), _id, channel["name"], logo))
 		return True
 
 	@staticmethod
+	@lru_cache(maxsize=None)
 	def convertgenre(genre):
 		id = 0
 		if genre in ("Classics", "Romance", "Thrillers", "Horror") or "Sci-Fi" in genre or "Action" in genre:
@@ -798,22 +2349,22 @@ class PlutoDownloadBase():
 		return id
 
 	@staticmethod
-	def getGuidedata(cc):
-		start = (datetime.datetime.fromtimestamp(PlutoDownloadBase.getLocalTime()).strftime("%Y-%m-%dT%H:00:00Z"))
-		stop = (datetime.datetime.fromtimestamp(PlutoDownloadBase.getLocalTime()) + datetime.timedelta(hours=24)).strftime("%Y-%m-%dT%H:00:00Z")
-		return sorted(plutoRequest.getBaseGuide(start, stop, cc), key=lambda x: x["number"])
+	def guideHours():
+		try:
+			return int(config.plugins.plutotv.epg_hours.value)
+		except (AttributeError, ValueError):
+			return 24
 
 	@staticmethod
-	def getLocalTime():
-		offset = datetime.datetime.utcnow() - datetime.datetime.now()
-		return time.time() + offset.total_seconds()
+	def guideWindow(since=0, hours=24):
+		"""Return the (start, stop) epoch of the guide to fetch, on whole UTC hours."""
+		begin = int(time.time()) // 3600 * 3600
+		return max(begin, int(since) // 3600 * 3600), begin + hours * 3600
 
 	@staticmethod
-	def strpTime(datestring, format="%Y-%m-%dT%H:%M:%S.%fZ"):
-		try:
-			return datetime.datetime.strptime(datestring, format)
-		except TypeError:
-			return datetime.datetime.fromtimestamp(time.mktime(time.strptime(datestring, format)))
+	def getGuidedata(cc, start, stop, callback, channels=None):
+		"""Pass the guide of start to stop to callback. Returns the epoch up to which it arrived."""
+		return plutoRequest.getBaseGuide(time.strftime("%Y-%m-%dT%H:00:00Z", time.gmtime(start)), time.strftime("%Y-%m-%dT%H:00:00Z", time.gmtime(stop)), cc, duration=(stop - start) // 60, callback=callback, channels=channels)
 
 	def start(self):
 		pass
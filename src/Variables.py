@@ -5,6 +5,11 @@ from os import path
 CONFIG_FOLDER = path.join(path.realpath(resolveFilename(SCOPE_CONFIG)), "PlutoTV")
 TIMER_FILE = path.join(CONFIG_FOLDER, "Plutotv.timer")
 RESUMEPOINTS_FILE = path.join(CONFIG_FOLDER, "resumepoints.pkl")
+BOOT_CACHE_FILE = path.join(CONFIG_FOLDER, "boot.json")
+API_ROUTES_FILE = path.join(CONFIG_FOLDER, "api.json")
+EPG_COVERAGE_FILE = path.join(CONFIG_FOLDER, "epgcoverage.json")
+EPG_FINGERPRINT_FILE = path.join(CONFIG_FOLDER, "epgfingerprints.pkl")
+PIPELINE_STATS_FILE = path.join(CONFIG_FOLDER, "stats.json")
 PLUGIN_FOLDER = path.dirname(path.realpath(__file__))
 PLUGIN_ICON = "plutotv.png"
 BOUQUET_FILE = "userbouquet.pluto_tv_%s.tv"
@@ -23,14 +23,14 @@
 
 # for localized messages
 from . import _, PluginLanguageDomain
-from .PlutoDownload import plutoRequest, PlutoDownload, Silent, getselectedcountries, PiconFetcher, COUNTRY_NAMES  # , getClips
+from .PlutoDownload import httpClient, pipelineStats, plutoRequest, profiled, PlutoDownload, Silent, getselectedcountries, PiconFetcher, COUNTRY_NAMES  # , getClips
 from .Variables import RESUMEPOINTS_FILE, TIMER_FILE, PLUGIN_FOLDER, BOUQUET_FILE, NUMBER_OF_LIVETV_BOUQUETS, PLUGIN_ICON, USER_AGENT
 
 from skin import applySkinFactor, fonts, parameters
 
 from Components.ActionMap import ActionMap, HelpableActionMap
 from Components.AVSwitch import AVSwitch
-from Components.config import config, ConfigSelection
+from Components.config import config, ConfigNothing, ConfigSelection
 from Components.Label import Label
 from Components.MenuList import MenuList
 from Components.MultiContent import MultiContentEntryText, MultiContentEntryPixmapAlphaBlend
@@ -60,7 +60,7 @@ import re
 from time import time, strftime, gmtime, localtime
 from urllib.parse import quote
 
-from twisted.internet import threads  # for fetching posters
+from twisted.internet import threads  # for saving the VoD catalog
 import requests
 
 DATA_FOLDER = ""
@@ -166,6 +166,34 @@ class ResumePoints():
 resumePointsInstance = ResumePoints()
 
 
+class CatalogCache:
+	# The last VoD catalog downloaded for each country, so the menu can be
+	# shown straight away and refreshed once the new catalog has arrived.
+	@staticmethod
+	def filename(country):
+		return DATA_FOLDER and os.path.join(DATA_FOLDER, "vod_%s.pkl" % country)
+
+	@staticmethod
+	def load(country):
+		if (filename := CatalogCache.filename(country)) and fileExists(filename):
+			try:
+				with open(filename, "rb") as f:
+					return pickle_load(f, encoding="utf8")
+			except Exception as ex:
+				print("[PlutoTV] CatalogCache, ERROR", ex)
+		return None
+
+	@staticmethod
+	def save(country, ondemand):
+		if filename := CatalogCache.filename(country):
+			try:
+				with open(filename + ".tmp", "wb") as f:
+					pickle_dump(ondemand, f, protocol=5)
+				os.replace(filename + ".tmp", filename)
+			except Exception as ex:
+				print("[PlutoTV] CatalogCache, ERROR", ex)
+
+
 class DownloadPosters:
 	def __init__(self):
 		if not DATA_FOLDER:
@@ -173,25 +201,24 @@ class DownloadPosters:
 		os.makedirs(DATA_FOLDER, exist_ok=True)  # create data folder if not exists
 
 	def downloadURL(self, url, name, callback):
-		success = False
+		# Call from the GUI thread. callback is called there once the poster is available.
 		if not name or not DATA_FOLDER:
 			return
 		filename = os.path.join(DATA_FOLDER, name)
 		if fileExists(filename):
-			success = True
-		else:
-			try:
-				response = requests.get(url, timeout=2.50, headers={"User-Agent": USER_AGENT})
-				response.raise_for_status()
-				content_type = response.headers.get('content-type')
-				if content_type and content_type.lower() == 'image/jpeg' and len(rc := response.content):
-					with open(filename, "wb") as f:
-						f.write(rc)
-						success = True
-			except requests.exceptions.RequestException:
-				pass
-		if success:
-			threads.deferToThread(callback, filename, name)
+			callback(filename, name)
+			return
+
+		def gotResponse(response):
+			response.raise_for_status()
+			content_type = response.headers.get('content-type')
+			if content_type and content_type.lower() == 'image/jpeg' and len(rc := response.content):
+				with open(filename, "wb") as f:
+					f.write(rc)
+				callback(filename, name)
+		d = httpClient.getAsync(url, timeout=2.50, headers={"User-Agent": USER_AGENT}, retries=1)
+		d.addCallback(gotResponse)
+		d.addErrback(lambda failure: failure.trap(requests.exceptions.RequestException))
 
 
 class PlutoList(MenuList):
@@ -338,6 +365,7 @@ class PlutoTV(Screen, HelpableScreen):
 		self.films = []
 		self.menu = []
 		self.history = []
+		self.pendingOndemand = None
 		self.chapters = {}
 		self.numSeasons = 0
 		self.vinfo = ""
@@ -385,7 +413,7 @@ class PlutoTV(Screen, HelpableScreen):
 			if len(picname) > 5:
 				self["poster"].hide()
 				self["posterBG"].hide()
-				threads.deferToThread(self.downloadPosters.downloadURL, pic, picname, self.downloadPostersCallback)  # url, name, callback
+				self.downloadPosters.downloadURL(pic, picname, self.downloadPostersCallback)  # url, name, callback
 
 		elif __type == "seasons":
 			self.eptitle = ""
@@ -446,9 +474,32 @@ class PlutoTV(Screen, HelpableScreen):
 		except Exception as ex:
 			print("[PlutoScreen] showImage, ERROR", ex)
 
+	@profiled("vod-categories")
 	def getCategories(self):
+		# Show the catalog saved last time, if any, and refresh it in the background.
+		self.catalogCountry = country = self.country
+		if cached := CatalogCache.load(country):
+			self.showCategories(cached)
+		plutoRequest.getOndemandAsync(country).addCallback(self.fetchCatalogCallback, country, cached)
+
+	def fetchCatalogCallback(self, ondemand, country, cached):
+		changed = ondemand != cached
+		if changed and ondemand.get("categories"):
+			threads.deferToThread(CatalogCache.save, country, ondemand)
+		if country != self.catalogCountry or country != self.country:  # country switched or screen closed in the meantime
+			return
+		if not cached:
+			self.showCategories(ondemand)
+		elif changed and ondemand.get("categories"):
+			if self.history:
+				self.pendingOndemand = ondemand  # swap in when the user is back at the top level
+			else:
+				self.showCategories(ondemand, self["feedlist"].getSelectionIndex())
+
+	def showCategories(self, ondemand, index=0):
 		self.lvod = {}
-		ondemand = plutoRequest.getOndemand(self.country)
+		self.menu = []
+		self.pendingOndemand = None
 		categories = ondemand.get("categories", [])
 		if not categories:
 			self.session.open(MessageBox, _("There is no data, it is possible that Pluto TV is not available in your country"), type=MessageBox.TYPE_ERROR, timeout=10)
@@ -458,6 +509,7 @@ class PlutoTV(Screen, HelpableScreen):
 			for key in self.menu:
 				list.append(self["feedlist"].listentry(key.decode("utf-8"), "menu", ""))
 			self["feedlist"].setList(list)
+			self["feedlist"].moveToIndex(min(index, len(list) - 1))
 		self["loading"].hide()
 
 	def buildlist(self, category):
@@ -533,6 +585,7 @@ class PlutoTV(Screen, HelpableScreen):
 			data = current[0]
 			return index, data[0], data[1], data[2]
 
+	@profiled("vod-action")
 	def action(self):
 		if not (selection := self.getSelection()):
 			return
@@ -627,6 +680,8 @@ class PlutoTV(Screen, HelpableScreen):
 			self.title = _("PlutoTV") + " - " + self.titlemenu
 			if not self.history:
 				self["poster"].hide()
+				if self.pendingOndemand:
+					self.showCategories(self.pendingOndemand, hist)
 
 	def playVOD(self, name, id, url=None):
 		if url:
@@ -703,6 +758,7 @@ class PlutoTV(Screen, HelpableScreen):
 		return text
 
 	def close(self, *args, **kwargs):
+		self.catalogCountry = None
 		if self.updatebutton in Silent.afterUpdate:
 			Silent.afterUpdate.remove(self.updatebutton)
 		Screen.close(self)
@@ -724,7 +780,18 @@ class PlutoSetup(Setup):
 				configList.append((_("LiveTV bouquet %s") % n, getattr(config.plugins.plutotv, "live_tv_country" + str(n)), _("Country for which LiveTV bouquet %s will be created.") % n))
 		configList.append(("---",))
 		configList.append((_("Picon type"), config.plugins.plutotv.picons, _("Using service name picons means they will continue to work even if the service reference changes. Also, they can be shared between channels of the same name that don't have the same service references.")))
+		configList.append((_("Parallel picon downloads"), config.plugins.plutotv.picon_workers, _("Number of picons that are downloaded at the same time. Lower this if your receiver or your network gets sluggish while the picons are fetched.")))
+		configList.append((_("Parallel downloads"), config.plugins.plutotv.fetch_concurrency, _("Number of guide requests that are sent to Pluto TV at the same time when updating the LiveTV bouquets. Select 'Off' to send them one after another.")))
+		configList.append((_("Countries downloaded in parallel"), config.plugins.plutotv.country_concurrency, _("When more than one LiveTV bouquet is selected, the data of the following countries is downloaded while the current country is being processed. This sets how many countries are downloaded at the same time. Select 'Off' to process one country after another.")))
+		configList.append((_("EPG days"), config.plugins.plutotv.epg_hours, _("How far ahead the EPG of the LiveTV bouquets is downloaded. Longer guides are downloaded one day at a time, each day while the one before is imported.")))
+		configList.append((_("EPG import batch size"), config.plugins.plutotv.epg_batch, _("Number of channels whose EPG is collected before it is imported into the EPG cache. The import then runs in the background while the next channels are processed. Select 'Off' to import every channel on its own.")))
+		configList.append((_("Incremental EPG update"), config.plugins.plutotv.incremental_epg, _("When the bouquets are updated automatically, only download the part of the EPG that is not yet in the EPG cache. The complete EPG is still downloaded when the channel list has changed or when you update the bouquets manually.")))
+		configList.append((_("Network engine"), config.plugins.plutotv.http_engine, _("'Threads' downloads with blocking requests in background threads. 'Twisted' does the downloads on the enigma2 main loop without occupying threads, which leaves the shared thread pool free for other plugins.")))
 		configList.append((_("Data location"), config.plugins.plutotv.datalocation, _("Used for storing video cover graphics, etc. A hard drive that goes into standby mode or a slow network mount are not good choices.")))
+		configList.append((_("Profiling"), config.plugins.plutotv.profiling, _("Profile LiveTV updates and VoD browsing. The results are written to the 'profiles' folder of the data location, the last 10 of each kind are kept. Leave this off unless you are asked for a profile.")))
+		if summary := pipelineStats.summary():
+			configList.append(("---",))
+			configList.append((_("Last LiveTV update: %s") % summary[0], ConfigNothing(), summary[1]))
 		self["config"].list = configList
 
 	def updateYellowButton(self):
@@ -830,6 +897,7 @@ def sessionstart(reason, session, **kwargs):
 		session.nav.playServiceExtensions.append(plutoRequest.playServiceExtension)
 	if hasattr(session.nav, "recordServiceExtensions") and plutoRequest.recordServiceExtension not in session.nav.recordServiceExtensions:
 		session.nav.recordServiceExtensions.append(plutoRequest.recordServiceExtension)
+	plutoRequest.startTokenRefresh()
 	Silent.init(session)
 
 